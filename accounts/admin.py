@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import UserProfile, Seller
+from .models import EmailOutbox, UserProfile, Seller
 
 admin.site.register(UserProfile)
 admin.site.register(Seller)
+admin.site.register(EmailOutbox)
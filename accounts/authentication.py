@@ -0,0 +1,22 @@
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from .tokens import ClaimsUser, get_token_version
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Authenticates from the token alone: ``request.user`` is a ``ClaimsUser``
+    built from the token's claims, and no user row is loaded. Use it on views
+    that only need ``request.user.id`` and the seller claims; views that
+    query by ``request.user`` need the regular ``JWTAuthentication``.
+    """
+
+    def get_user(self, validated_token):
+        user = ClaimsUser(validated_token)
+        if user.seller_id is not None and get_token_version(user.seller_id) != user.token_version:
+            raise AuthenticationFailed(
+                'Seller status changed since this token was issued; log in again.',
+                code='token_outdated',
+            )
+        return user
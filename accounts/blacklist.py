@@ -0,0 +1,76 @@
+"""
+Fast blacklist lookups for refresh tokens.
+
+simplejwt checks the blacklist with a JOIN against ``OutstandingToken`` on
+every refresh. Here each process instead keeps the JTIs of blacklisted,
+unexpired tokens in memory. The first lookup loads them once, and afterwards
+only rows blacklisted since the last sync are read, at most every
+``TOKEN_BLACKLIST_SYNC_SECONDS``. Tokens blacklisted through
+``ClaimsRefreshToken.blacklist()`` are also written to the shared cache, so
+with a shared cache backend other processes see a logout immediately instead
+of on their next sync.
+"""
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+CACHE_KEY = 'accounts:blacklisted:{}'
+# Re-read rows blacklisted slightly before the last sync, to catch
+# transactions that committed late
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class BlacklistIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._expiry = {}  # jti -> expiry as a unix timestamp
+        self._synced_at = None  # wall clock of the last sync
+        self._next_sync = 0.0  # monotonic deadline of the next sync
+
+    def _sync(self):
+        if time.monotonic() < self._next_sync:
+            return
+        with self._lock:
+            if time.monotonic() < self._next_sync:
+                return
+            now = timezone.now()
+            rows = BlacklistedToken.objects.filter(token__expires_at__gt=now)
+            if self._synced_at is not None:
+                rows = rows.filter(blacklisted_at__gte=self._synced_at - SYNC_OVERLAP)
+            expiry = {jti: expires_at.timestamp() for jti, expires_at in rows.values_list(
+                'token__jti', 'token__expires_at'
+            )}
+            cutoff = now.timestamp()
+            self._expiry = {
+                jti: expires for jti, expires in self._expiry.items() if expires > cutoff
+            }
+            self._expiry.update(expiry)
+            self._synced_at = now
+            self._next_sync = time.monotonic() + settings.TOKEN_BLACKLIST_SYNC_SECONDS
+
+    def contains(self, jti):
+        self._sync()
+        if jti in self._expiry:
+            return True
+        return cache.get(CACHE_KEY.format(jti)) is not None
+
+    def add(self, jti, exp):
+        """Record a token just blacklisted in this process; ``exp`` is its unix expiry."""
+        self._expiry[jti] = exp
+        remaining = int(exp - time.time())
+        if remaining > 0:
+            cache.set(CACHE_KEY.format(jti), 1, timeout=remaining)
+
+    def reset(self):
+        with self._lock:
+            self._expiry = {}
+            self._synced_at = None
+            self._next_sync = 0.0
+
+
+index = BlacklistIndex()
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with the work factor taken from ``PASSWORD_PBKDF2_ITERATIONS``.
+
+    It keeps the ``pbkdf2_sha256`` algorithm name, so existing hashes verify
+    unchanged. A stored hash whose iteration count differs from the setting
+    is re-encoded on the user's next successful login, which makes changing
+    the setting (up or down) a rolling upgrade.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
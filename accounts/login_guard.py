@@ -0,0 +1,97 @@
+"""
+Cheap rejection of login attempts before any password hashing.
+
+``LoginGuard`` keeps three kinds of cache entries:
+
+* failure counters per username and client IP pair and per client IP, in a
+  fixed window of ``LOGIN_FAILURE_WINDOW`` seconds. Once either counter
+  reaches its limit, attempts are refused with 429 until the window ends.
+  The username counter is scoped to the IP so that failures from one client
+  can't lock the account for everyone else. The client IP is DRF's
+  ``get_ident``, which trusts ``X-Forwarded-For`` only as far as the
+  ``NUM_PROXIES`` setting says;
+* a negative cache of credential pairs that recently failed. The key is an
+  HMAC of the username and password, so the password itself is never
+  stored. A repeat of the same wrong pair is rejected without running the
+  hasher;
+* a per-username generation, which is part of that HMAC and is bumped when
+  the user's password changes, so an old "bad" entry can never shadow a new
+  password.
+
+Usernames are hashed into the keys as well, so any input is a valid cache key.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+from rest_framework.throttling import BaseThrottle
+
+FAILURES_KEY = 'accounts:login:failures:{}'
+BAD_CREDENTIALS_KEY = 'accounts:login:bad:{}'
+GENERATION_KEY = 'accounts:login:generation:{}'
+
+
+def _digest(value):
+    return salted_hmac('accounts.login_guard', value).hexdigest()
+
+
+def bump_generation(username):
+    """Forget every cached bad password for ``username``; call when its password changes."""
+    cache.set(
+        GENERATION_KEY.format(_digest(username)),
+        time.time_ns(),
+        timeout=2 * settings.LOGIN_BAD_CREDENTIALS_TTL,
+    )
+
+
+class LoginGuard:
+    def __init__(self, request, username):
+        self.username = username
+        user_digest = _digest(username)
+        ip_digest = _digest(BaseThrottle().get_ident(request))
+        self.user_key = FAILURES_KEY.format(f'user:{user_digest}:{ip_digest}')
+        self.ip_key = FAILURES_KEY.format(f'ip:{ip_digest}')
+        self.generation_key = GENERATION_KEY.format(user_digest)
+        self._state = None
+
+    @property
+    def enabled(self):
+        return settings.LOGIN_GUARD_ENABLED
+
+    def _load(self):
+        if self._state is None:
+            self._state = cache.get_many([self.user_key, self.ip_key, self.generation_key])
+        return self._state
+
+    def is_blocked(self):
+        if not self.enabled:
+            return False
+        state = self._load()
+        return (
+            state.get(self.user_key, 0) >= settings.LOGIN_MAX_FAILURES_PER_USERNAME_IP
+            or state.get(self.ip_key, 0) >= settings.LOGIN_MAX_FAILURES_PER_IP
+        )
+
+    def is_known_bad(self, password):
+        return self.enabled and cache.get(self._credentials_key(password)) is not None
+
+    def record_failure(self, password):
+        if not self.enabled:
+            return
+        for key in (self.user_key, self.ip_key):
+            # add() starts the window; incr() keeps the existing expiry
+            if not cache.add(key, 1, timeout=settings.LOGIN_FAILURE_WINDOW):
+                try:
+                    cache.incr(key)
+                except ValueError:
+                    cache.add(key, 1, timeout=settings.LOGIN_FAILURE_WINDOW)
+        cache.set(self._credentials_key(password), 1, timeout=settings.LOGIN_BAD_CREDENTIALS_TTL)
+
+    def record_success(self):
+        if self.enabled:
+            cache.delete(self.user_key)
+
+    def _credentials_key(self, password):
+        generation = self._load().get(self.generation_key, 0)
+        return BAD_CREDENTIALS_KEY.format(_digest(f'{generation}\0{self.username}\0{password}'))
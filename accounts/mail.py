@@ -0,0 +1,136 @@
+"""
+Durable outbox for outgoing mail.
+
+Requests only insert an ``EmailOutbox`` row (``enqueue``); the
+``send_queued_mail`` command delivers due rows in batches, one backend
+connection per batch. A worker claims a batch by pushing its
+``next_attempt_at`` past a lease, so several workers never send the same
+message twice under normal operation. Failures are retried with exponential
+backoff until ``max_attempts``, after which the row is marked failed.
+
+Bodies can hold secrets such as password reset links, so a row's body is
+blanked as soon as it is sent or has failed for good, and ``prune_mail``
+deletes finished rows after ``EMAIL_OUTBOX_RETENTION_DAYS``.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_ATTEMPTS = 6
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_MAX = timedelta(hours=1)
+# How long a claimed batch stays invisible to other workers
+CLAIM_LEASE = timedelta(minutes=5)
+
+
+def enqueue(subject, message, recipient_list, from_email=None):
+    return EmailOutbox.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL or '',
+        recipients=list(recipient_list),
+    )
+
+
+def backoff(attempts):
+    return min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+
+
+def claim_batch(batch_size):
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status=EmailOutbox.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if batch:
+            EmailOutbox.objects.filter(pk__in=[mail.pk for mail in batch]).update(
+                next_attempt_at=now + CLAIM_LEASE
+            )
+    return batch
+
+
+def send_batch(batch_size=DEFAULT_BATCH_SIZE, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Send one batch of due mail over a single connection. Returns ``(sent, failed)``."""
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        # Could not reach the mail server: every message backs off
+        for mail in batch:
+            _record_failure(mail, exc, max_attempts)
+        return 0, len(batch)
+
+    sent = failed = 0
+    try:
+        for mail in batch:
+            message = EmailMessage(
+                subject=mail.subject,
+                body=mail.body,
+                from_email=mail.from_email or None,
+                to=mail.recipients,
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as exc:
+                failed += 1
+                _record_failure(mail, exc, max_attempts)
+                # The connection may be unusable now; start a fresh one
+                connection.close()
+                _reopen(connection)
+            else:
+                sent += 1
+                mail.status = EmailOutbox.SENT
+                mail.sent_at = timezone.now()
+                mail.body = ''
+                mail.save(update_fields=['status', 'sent_at', 'body'])
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def _reopen(connection):
+    try:
+        connection.open()
+    except Exception:
+        # Leave it closed; the next send() fails and is retried later
+        pass
+
+
+def _record_failure(mail, exc, max_attempts):
+    mail.attempts += 1
+    mail.last_error = f'{type(exc).__name__}: {exc}'
+    if mail.attempts >= max_attempts:
+        mail.status = EmailOutbox.FAILED
+        mail.body = ''
+    else:
+        mail.next_attempt_at = timezone.now() + backoff(mail.attempts)
+    mail.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at', 'body'])
+
+
+def prune(older_than, batch_size=1000):
+    """Delete sent and failed rows created before ``older_than``. Returns the number deleted."""
+    finished = (
+        EmailOutbox.objects.filter(status__in=[EmailOutbox.SENT, EmailOutbox.FAILED], created_at__lt=older_than)
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+    pruned = 0
+    while True:
+        with transaction.atomic():
+            ids = list(finished[:batch_size])
+            if not ids:
+                return pruned
+            pruned += EmailOutbox.objects.filter(id__in=ids).delete()[0]
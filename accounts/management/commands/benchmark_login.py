@@ -0,0 +1,83 @@
+import random
+import time
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+
+from accounts.views import LoginView
+from products.management.seeding import rolled_back
+
+PASSWORD = 'correct horse battery staple'
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure login throughput under a mix of valid logins and repeated "
+        "invalid attempts (wrong passwords and unknown usernames from a few "
+        "attacking IPs), with the login guard off and on. Users are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300, help='Login attempts per run.')
+        parser.add_argument('--users', type=int, default=20, help='Legitimate users to create.')
+        parser.add_argument('--invalid-ratio', type=float, default=0.8,
+                            help='Share of attempts that use bad credentials.')
+        parser.add_argument('--attackers', type=int, default=3, help='Distinct attacking IPs.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with rolled_back(), override_settings(ALLOWED_HOSTS=['testserver']):
+            # One real hash shared by every user keeps seeding fast
+            encoded = make_password(PASSWORD)
+            run = uuid.uuid4().hex[:8]
+            users = User.objects.bulk_create([
+                User(username=f'bench-{run}-{i}', password=encoded) for i in range(options['users'])
+            ])
+
+            self.stdout.write(f"{'guard':<6} {'req/s':>8} {'p50 ms':>8} {'ok':>5} {'401':>5} {'429':>5}")
+            for enabled in (False, True):
+                with override_settings(LOGIN_GUARD_ENABLED=enabled):
+                    # A fresh run id per pass keeps the cache state of one pass out of the other
+                    attempts = self._attempts(users, f'{run}-{int(enabled)}', options)
+                    self._report('on' if enabled else 'off', self._run(attempts))
+
+    def _attempts(self, users, run, options):
+        rng = random.Random(options['seed'])
+        attackers = [f'10.{rng.randrange(256)}.{rng.randrange(256)}.{i}' for i in range(options['attackers'])]
+        # Attackers cycle through a small dictionary against real and made-up usernames
+        targets = [user.username for user in users[:3]] + [f'ghost-{run}-{i}' for i in range(3)]
+        guesses = ['123456', 'password', 'qwerty', 'letmein']
+        attempts = []
+        for i in range(options['requests']):
+            if rng.random() < options['invalid_ratio']:
+                attempts.append((rng.choice(targets), rng.choice(guesses), rng.choice(attackers)))
+            else:
+                attempts.append((rng.choice(users).username, PASSWORD, f'192.168.0.{i % 250}'))
+        return attempts
+
+    def _run(self, attempts):
+        factory = APIRequestFactory()
+        view = LoginView.as_view()
+        timings, statuses = [], {}
+        started = time.perf_counter()
+        for username, password, ip in attempts:
+            request = factory.post(
+                '/api/accounts/login/', {'username': username, 'password': password},
+                format='json', REMOTE_ADDR=ip,
+            )
+            start = time.perf_counter()
+            response = view(request)
+            timings.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        return time.perf_counter() - started, sorted(timings), statuses
+
+    def _report(self, label, result):
+        duration, timings, statuses = result
+        self.stdout.write(
+            f'{label:<6} {len(timings) / duration:>8.1f} {timings[len(timings) // 2] * 1000:>8.2f} '
+            f'{statuses.get(200, 0):>5} {statuses.get(401, 0):>5} {statuses.get(429, 0):>5}'
+        )
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts import mail
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete sent and failed outbox rows older than the retention period, in "
+        "small batches. Schedule it (e.g. daily from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.EMAIL_OUTBOX_RETENTION_DAYS,
+                            help='Keep finished rows for this many days.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per transaction.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        pruned = mail.prune(cutoff, options['batch_size'])
+        self.stdout.write(f'Pruned {pruned} outbox row(s).')
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding and blacklisted tokens in small batches, "
+        "each in its own short transaction. Schedule it (e.g. daily from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tokens deleted per transaction.')
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help='Seconds to pause between batches to leave room for other writers.')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = (
+            OutstandingToken.objects.filter(expires_at__lte=now)
+            # Expired tokens are the oldest ones, so walking the primary key finds them quickly
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+        pruned = blacklisted = 0
+        while True:
+            with transaction.atomic():
+                ids = list(expired[:options['batch_size']])
+                if not ids:
+                    break
+                blacklisted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+                pruned += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        self.stdout.write(f'Pruned {pruned} outstanding token(s), {blacklisted} of them blacklisted.')
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts import mail
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued mail from the outbox in batches over one connection per "
+        "batch, retrying failures with exponential backoff. Runs until the queue "
+        "is drained, or forever with --loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=mail.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--max-attempts', type=int, default=mail.DEFAULT_MAX_ATTEMPTS,
+                            help='Attempts before a message is marked failed.')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new mail.')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds to wait when the queue is empty (with --loop).')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = mail.send_batch(options['batch_size'], options['max_attempts'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f'Sent {sent}, failed {failed}.')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(f'Done: sent {total_sent}, failed {total_failed}.')
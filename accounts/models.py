@@ -1,6 +1,25 @@
 # accounts/models.py
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+class SellerQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        # update() skips Seller.save() and its signals, so bump and republish
+        # the token versions here whenever verification is written
+        if 'is_verified' not in kwargs:
+            return super().update(**kwargs)
+        from .tokens import forget_token_versions
+
+        kwargs.setdefault('token_version', F('token_version') + 1)
+        with transaction.atomic(using=self.db):
+            seller_ids = list(self.values_list('pk', flat=True))
+            rows = super().update(**kwargs)
+            transaction.on_commit(lambda: forget_token_versions(seller_ids), using=self.db)
+        return rows
 
 
 class Seller(models.Model):
@@ -9,7 +28,28 @@ class Seller(models.Model):
     tax_id = models.CharField(max_length=50, blank=True)
     is_verified = models.BooleanField(default=False)
     phone_number = models.CharField(max_length=20, blank=True)
+    # Bumped whenever is_verified changes, by save() or by
+    # Seller.objects.update(); outstanding tokens carrying an older version
+    # are rejected (see accounts/tokens.py)
+    token_version = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = SellerQuerySet.as_manager()
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_is_verified = instance.__dict__.get('is_verified')
+        return instance
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_loaded_is_verified', None)
+        if loaded is not None and loaded != self.is_verified:
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self._loaded_is_verified = self.is_verified
 
     def __str__(self):
         return f"{self.company_name} ({self.user.username})"
@@ -21,4 +61,33 @@ class UserProfile(models.Model):
     is_customer = models.BooleanField(default=True)
 
 
+class EmailOutbox(models.Model):
+    """Outgoing mail waiting for the ``send_queued_mail`` worker (see accounts/mail.py)."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Backs the worker's "due pending mail" query
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
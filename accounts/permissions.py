@@ -15,15 +15,18 @@ class IsSuperUserOrReadOnly(permissions.BasePermission):
 class IsVerifiedSellerOrReadOnly(permissions.BasePermission):
     """
     Allows read-only access to all, write access only to verified sellers who own the object.
+
+    Reads the ``seller_id`` and ``is_verified`` token claims, so the view must
+    use ``ClaimsJWTAuthentication``; no database query is made.
     """
     def has_permission(self, request, view):
         if request.method in permissions.SAFE_METHODS:
             return True
-        return (request.user.is_authenticated and
-                hasattr(request.user, 'seller_profile') and
-                request.user.seller_profile.is_verified)
+        return bool(request.user.is_authenticated and
+                    getattr(request.user, 'seller_id', None) is not None and
+                    getattr(request.user, 'is_verified', False))
 
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
-        return obj.seller.user == request.user
\ No newline at end of file
+        return obj.seller_id == request.user.seller_id
\ No newline at end of file
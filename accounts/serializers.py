@@ -4,9 +4,13 @@ from django.contrib.auth import authenticate
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.utils.encoding import smart_str, force_str, smart_bytes
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
-from django.core.mail import send_mail
 from django.conf import settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from . import mail
 from .models import UserProfile, Seller
+from .tokens import ClaimsRefreshToken
 
 
 
@@ -70,6 +74,30 @@ class LoginSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True)
 
 
+class TokenRefreshRequestSerializer(TokenRefreshSerializer):
+    # Checks the blacklist through the in-memory index instead of the database
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        # One query: the user must still exist and be active, and its
+        # privilege flags are re-read instead of copied from the refresh token
+        user = refresh.get_user()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        data = {'access': str(refresh.access_token_for(user))}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data['refresh'] = str(refresh)
+        return data
+
+
 
 class PasswordResetRequestSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -94,12 +122,12 @@ class PasswordResetRequestSerializer(serializers.Serializer):
 
         reset_url = f"{settings.FRONTEND_URL}/reset-password/{uid}/{token}/"
 
-        send_mail(
+        # Delivered by the send_queued_mail worker so the request never waits on SMTP
+        mail.enqueue(
             subject="Password Reset Request",
             message=f"Please click the link to reset your password: {reset_url}",
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[user.email],
-            fail_silently=False,
         )
 
 
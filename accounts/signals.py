@@ -0,0 +1,25 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .login_guard import bump_generation
+from .models import Seller
+from .tokens import forget_token_version, set_token_version
+
+
+@receiver(post_save, sender=Seller)
+def publish_token_version(sender, instance, **kwargs):
+    transaction.on_commit(lambda: set_token_version(instance.pk, instance.token_version))
+
+
+@receiver(post_delete, sender=Seller)
+def drop_token_version(sender, instance, **kwargs):
+    transaction.on_commit(lambda: forget_token_version(instance.pk))
+
+
+@receiver(post_save, sender=User)
+def forget_bad_passwords(sender, instance, **kwargs):
+    # set_password() leaves the raw password in _password until save() finishes
+    if getattr(instance, '_password', None) is not None:
+        transaction.on_commit(lambda: bump_generation(instance.username))
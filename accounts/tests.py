@@ -1,36 +1,284 @@
-import os
-import django
+import io
+import time
+from datetime import timedelta
 
-# Django konfiqurasiyasını yükləyin
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce.settings')
-django.setup()
-
-# Django'nun authenticate funksiyasını import edin
-from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
+from django.core import mail as outbox
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from . import blacklist, mail
+from .models import EmailOutbox, Seller
+from .tokens import ClaimsRefreshToken, get_token_version, set_token_version
+
+
+class AccountsTestCase(APITestCase):
+
+    def setUp(self):
+        # Token versions, the login guard and the blacklist all keep state in the cache
+        cache.clear()
+        blacklist.index.reset()
+
+    def login(self, username, password='secret-pass'):
+        response = self.client.post(
+            reverse('login'), {'username': username, 'password': password}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data
+
+    def refresh(self, token):
+        return self.client.post(reverse('token-refresh'), {'refresh': token}, format='json')
+
+
+class ClaimsTokenTests(AccountsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', password='secret-pass', is_staff=True, is_superuser=True
+        )
+        cls.seller = Seller.objects.create(
+            user=User.objects.create_user(username='seller', password='secret-pass'),
+            company_name='Company',
+            is_verified=True,
+        )
+
+    def create_category(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        response = self.client.post(
+            reverse('category-list-create'), {'name': 'Widgets', 'slug': 'widgets'}, format='json'
+        )
+        self.client.credentials()
+        return response
+
+    def test_privileges_are_only_in_access_tokens(self):
+        tokens = self.login('admin')
+        refresh = ClaimsRefreshToken(tokens['refresh'])
+        self.assertNotIn('is_superuser', refresh.payload)
+        self.assertNotIn('is_staff', refresh.payload)
+        self.assertEqual(self.create_category(tokens['access']).status_code, 201)
+
+    def test_refresh_rereads_privileges(self):
+        tokens = self.login('admin')
+        User.objects.filter(pk=self.admin.pk).update(is_superuser=False)
+        response = self.refresh(tokens['refresh'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.create_category(response.data['access']).status_code, 403)
+
+    def test_queryset_update_outdates_seller_tokens(self):
+        set_token_version(self.seller.pk, self.seller.token_version)
+        access = self.login('seller')['access']
+        with self.captureOnCommitCallbacks(execute=True):
+            Seller.objects.filter(pk=self.seller.pk).update(is_verified=False)
+        self.assertEqual(get_token_version(self.seller.pk), self.seller.token_version + 1)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        response = self.client.post(reverse('products'), {}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+
+class TokenRefreshTests(AccountsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='alice', password='secret-pass')
+
+    def test_refresh(self):
+        refresh = self.login('alice')['refresh']
+        self.assertEqual(self.refresh(refresh).status_code, 200)
+        # the blacklist is already in memory: only the user row is read
+        with self.assertNumQueries(1):
+            response = self.refresh(refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.data)
+
+    def test_blacklisted_token_is_refused(self):
+        tokens = self.login('alice')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        response = self.client.post(reverse('logout'), {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, 205)
+        self.client.credentials()
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 401)
+
+    def test_deleted_or_inactive_user_is_refused(self):
+        refresh = self.login('alice')['refresh']
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+        self.user.delete()
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+
+@override_settings(
+    LOGIN_GUARD_ENABLED=True, LOGIN_MAX_FAILURES_PER_USERNAME_IP=3, LOGIN_MAX_FAILURES_PER_IP=5
+)
+class LoginGuardTests(AccountsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='alice', password='secret-pass')
+
+    def attempt(self, password, username='alice', ip='10.0.0.1', **extra):
+        return self.client.post(
+            reverse('login'), {'username': username, 'password': password},
+            format='json', REMOTE_ADDR=ip, **extra
+        )
+
+    def test_locks_username_for_the_failing_client_only(self):
+        for i in range(3):
+            self.assertEqual(self.attempt(f'wrong-{i}').status_code, 401)
+        self.assertEqual(self.attempt('secret-pass').status_code, 429)
+        # the owner, from another address, is not locked out
+        self.assertEqual(self.attempt('secret-pass', ip='10.0.0.2').status_code, 200)
+
+    def test_forwarded_for_does_not_rotate_the_ip(self):
+        for i in range(5):
+            self.attempt('wrong', username=f'user{i}', HTTP_X_FORWARDED_FOR=f'192.0.2.{i}')
+        response = self.attempt('secret-pass', HTTP_X_FORWARDED_FOR='192.0.2.99')
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(LOGIN_FAILURE_WINDOW=1)
+    def test_lock_expires_with_the_window(self):
+        for i in range(3):
+            self.attempt(f'wrong-{i}')
+        self.assertEqual(self.attempt('secret-pass').status_code, 429)
+        time.sleep(1.1)
+        self.assertEqual(self.attempt('secret-pass').status_code, 200)
+
+    def test_known_bad_pair_skips_the_hasher(self):
+        self.attempt('wrong')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.attempt('wrong').status_code, 401)
+
+    def test_password_change_forgets_bad_passwords(self):
+        self.attempt('new-secret-pass')
+        self.user.set_password('new-secret-pass')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.attempt('new-secret-pass').status_code, 200)
+
+
+class BlacklistIndexTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='alice', password='secret-pass')
+
+    def setUp(self):
+        cache.clear()
+        blacklist.index.reset()
+
+    def test_hits_and_misses(self):
+        kept = ClaimsRefreshToken.for_user(self.user)
+        revoked = ClaimsRefreshToken.for_user(self.user)
+        revoked.blacklist()
+        self.assertTrue(blacklist.index.contains(revoked['jti']))
+        self.assertFalse(blacklist.index.contains(kept['jti']))
+
+    def test_loads_tokens_blacklisted_elsewhere(self):
+        # as if another process blacklisted it: a database row, nothing in this process or the cache
+        token = ClaimsRefreshToken.for_user(self.user)
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=token['jti']))
+        self.assertTrue(blacklist.index.contains(token['jti']))
+        # later lookups are answered from memory
+        with self.assertNumQueries(0):
+            self.assertTrue(blacklist.index.contains(token['jti']))
+            self.assertFalse(blacklist.index.contains('unknown'))
+
+    def test_prune_tokens(self):
+        expired, revoked_expired, current = (ClaimsRefreshToken.for_user(self.user) for _ in range(3))
+        revoked_expired.blacklist()
+        OutstandingToken.objects.filter(jti__in=[expired['jti'], revoked_expired['jti']]).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        out = io.StringIO()
+        call_command('prune_tokens', stdout=out)
+        self.assertIn('Pruned 2 outstanding token(s), 1 of them blacklisted.', out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), [current['jti']])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+class FailingEmailBackend(EmailBackend):
+
+    def send_messages(self, messages):
+        raise ConnectionRefusedError('mail server down')
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class EmailOutboxTests(TestCase):
+
+    def send_queued_mail(self):
+        call_command('send_queued_mail', stdout=io.StringIO())
+
+    def test_password_reset_is_queued_and_sent(self):
+        User.objects.create_user(username='alice', email='alice@example.com', password='secret-pass')
+        response = self.client.post(
+            reverse('password-reset'), {'email': 'alice@example.com', 'username': 'alice'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(outbox.outbox, [])
+        queued = EmailOutbox.objects.get()
+        self.assertIn('/reset-password/', queued.body)
+
+        self.send_queued_mail()
+        self.assertEqual(len(outbox.outbox), 1)
+        self.assertEqual(outbox.outbox[0].to, ['alice@example.com'])
+        self.assertIn('/reset-password/', outbox.outbox[0].body)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, EmailOutbox.SENT)
+        self.assertIsNotNone(queued.sent_at)
+        # the reset link doesn't outlive delivery
+        self.assertEqual(queued.body, '')
 
-# İstifadəçi adı və şifrəni burada daxil edin
-username = 'vafa_admin'
-password = '12.04.2005'
+    def test_failure_is_retried(self):
+        queued = mail.enqueue('Subject', 'Body', ['bob@example.com'])
+        with override_settings(EMAIL_BACKEND='accounts.tests.FailingEmailBackend'):
+            self.assertEqual(mail.send_batch(), (0, 1))
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (EmailOutbox.PENDING, 1))
+        self.assertIn('mail server down', queued.last_error)
+        self.assertGreater(queued.next_attempt_at, timezone.now())
+        # not due until the backoff has passed
+        self.assertEqual(mail.send_batch(), (0, 0))
 
-# authenticate() funksiyasını çağırın
-user = authenticate(username=username, password=password)
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(mail.send_batch(), (1, 0))
+        self.assertEqual(len(outbox.outbox), 1)
 
-# İstifadəçi tapıldıqda
-if user is not None:
-    print("User authenticated successfully")
-else:
-    print("Authentication failed")
+    def test_gives_up_after_max_attempts(self):
+        queued = mail.enqueue('Subject', 'Body', ['bob@example.com'])
+        with override_settings(EMAIL_BACKEND='accounts.tests.FailingEmailBackend'):
+            mail.send_batch(max_attempts=1)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.body), (EmailOutbox.FAILED, ''))
 
-    # Dəqiq problemi tapmaq üçün əlavə yoxlamalar
-    try:
-        # İstifadəçi adı ilə məlumatı tapmağa çalışın
-        user_obj = User.objects.get(username=username)
-        if user_obj.check_password(password):
-            print("Password is correct, but authentication failed due to other reasons.")
-        else:
-            print("Password is incorrect.")
-    except User.DoesNotExist:
-        print(f"User with username '{username}' does not exist.")
+    def test_claimed_rows_are_not_sent_twice(self):
+        for i in range(3):
+            mail.enqueue(f'Subject {i}', 'Body', ['bob@example.com'])
+        first = mail.claim_batch(2)
+        # a second worker only gets what the first one left
+        second = mail.claim_batch(10)
+        third = mail.claim_batch(10)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertEqual(third, [])
+        self.assertFalse({row.pk for row in first} & {row.pk for row in second})
+        self.assertEqual(mail.send_batch(), (0, 0))
 
+    def test_prune_deletes_old_finished_rows(self):
+        old = timezone.now() - timedelta(days=30)
+        for status in (EmailOutbox.SENT, EmailOutbox.FAILED, EmailOutbox.PENDING):
+            mail.enqueue('Subject', 'Body', ['bob@example.com'])
+            EmailOutbox.objects.filter(status=EmailOutbox.PENDING).update(status=status, created_at=old)
+        recent = mail.enqueue('Subject', 'Body', ['bob@example.com'])
+        EmailOutbox.objects.filter(pk=recent.pk).update(status=EmailOutbox.SENT)
 
+        call_command('prune_mail', stdout=io.StringIO())
+        self.assertEqual(
+            sorted(EmailOutbox.objects.values_list('status', flat=True)), [EmailOutbox.PENDING, EmailOutbox.SENT]
+        )
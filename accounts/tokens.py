@@ -0,0 +1,109 @@
+"""
+JWTs that carry what request authorization needs.
+
+Tokens issued at login embed the user's seller id and verification flag, so
+``ClaimsJWTAuthentication`` and the permissions can authorize a request
+without loading the ``User`` or ``Seller`` rows. The claims are a snapshot:
+each seller token also carries ``Seller.token_version``, which is bumped
+whenever the seller's verification changes, and a token whose version no
+longer matches is rejected.
+
+``Seller.token_version`` in the database is the source of truth. Versions are
+cached for ``TOKEN_VERSION_CACHE_SECONDS``: a bump is written to the cache
+right away, so with a shared cache backend every process sees it at once, and
+with a per-process cache the other processes see it within that time.
+
+``is_staff`` and ``is_superuser`` only go into access tokens. They are read
+from the user row at login and again on every refresh, so a demotion takes
+effect within one access token lifetime.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import blacklist
+from .models import Seller
+
+TOKEN_VERSION_KEY = 'accounts:token_version:{}'
+
+
+class ClaimsRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        seller = Seller.objects.filter(user=user).only('id', 'is_verified', 'token_version').first()
+        token['seller_id'] = seller.pk if seller else None
+        token['is_verified'] = seller.is_verified if seller else False
+        token['token_version'] = seller.token_version if seller else 0
+        return token
+
+    def access_token_for(self, user):
+        """An access token with this token's claims and ``user``'s current privilege flags."""
+        access = self.access_token
+        access['is_staff'] = user.is_staff
+        access['is_superuser'] = user.is_superuser
+        return access
+
+    def get_user(self):
+        """The token's user with the fields a refresh needs, or ``None`` if it was deleted."""
+        return User.objects.filter(
+            **{api_settings.USER_ID_FIELD: self.payload.get(api_settings.USER_ID_CLAIM)}
+        ).only('id', 'is_active', 'is_staff', 'is_superuser').first()
+
+    def check_blacklist(self):
+        # Served from memory/cache instead of a query (see accounts/blacklist.py)
+        if blacklist.index.contains(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        entry = super().blacklist()
+        blacklist.index.add(self.payload[api_settings.JTI_CLAIM], self.payload['exp'])
+        return entry
+
+
+class ClaimsUser(TokenUser):
+    """A ``TokenUser`` that exposes the seller claims."""
+
+    @property
+    def seller_id(self):
+        return self.token.get('seller_id')
+
+    @property
+    def is_seller(self):
+        return self.seller_id is not None
+
+    @property
+    def is_verified(self):
+        return bool(self.token.get('is_verified', False))
+
+    @property
+    def token_version(self):
+        return self.token.get('token_version', 0)
+
+
+def get_token_version(seller_id):
+    """Current token version of a seller, or ``None`` if the seller no longer exists."""
+    key = TOKEN_VERSION_KEY.format(seller_id)
+    version = cache.get(key)
+    if version is None:
+        version = Seller.objects.filter(pk=seller_id).values_list('token_version', flat=True).first()
+        if version is not None:
+            cache.set(key, version, settings.TOKEN_VERSION_CACHE_SECONDS)
+    return version
+
+
+def set_token_version(seller_id, version):
+    cache.set(TOKEN_VERSION_KEY.format(seller_id), version, settings.TOKEN_VERSION_CACHE_SECONDS)
+
+
+def forget_token_version(seller_id):
+    cache.delete(TOKEN_VERSION_KEY.format(seller_id))
+
+
+def forget_token_versions(seller_ids):
+    cache.delete_many([TOKEN_VERSION_KEY.format(seller_id) for seller_id in seller_ids])
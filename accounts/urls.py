@@ -4,6 +4,7 @@ from .views import (
     SellerRegisterView,  # New view
     LoginView,
     LogoutView,
+    TokenRefreshView,
     PasswordResetRequestView,
     SetNewPasswordView
 )
@@ -12,6 +13,7 @@ urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('register/seller/', SellerRegisterView.as_view(), name='seller-register'),  # New path
     path('login/', LoginView.as_view(), name='login'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('password-reset/', PasswordResetRequestView.as_view(), name='password-reset'),
     path('password-reset-confirm/', SetNewPasswordView.as_view(), name='password-reset-confirm'),
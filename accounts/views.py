@@ -1,18 +1,20 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
 from django.conf import settings
 from .serializers import (
     RegisterSerializer,
     LoginSerializer,
     PasswordResetRequestSerializer,
     SetNewPasswordSerializer,
-    SellerRegisterSerializer  # New serializer needed
+    SellerRegisterSerializer,  # New serializer needed
+    TokenRefreshRequestSerializer
 )
 from django.contrib.auth import authenticate
+from .login_guard import LoginGuard
 from .models import Seller  # Import the Seller model
+from .tokens import ClaimsRefreshToken
 
 
 
@@ -65,34 +67,67 @@ class LoginView(APIView):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        user = authenticate(
-            username=serializer.validated_data['username'],
-            password=serializer.validated_data['password']
+        username = serializer.validated_data['username']
+        password = serializer.validated_data['password']
+
+        # Refuse floods and known-bad pairs before paying for a password hash
+        guard = LoginGuard(request, username)
+        if guard.is_blocked():
+            return Response(
+                {"detail": "Too many failed login attempts. Try again later."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(settings.LOGIN_FAILURE_WINDOW)}
+            )
+        user = None if guard.is_known_bad(password) else authenticate(
+            username=username,
+            password=password
         )
 
         if not user:
+            guard.record_failure(password)
             return Response(
                 {"detail": "Invalid credentials"},
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
-        refresh = RefreshToken.for_user(user)
+        guard.record_success()
+        refresh = ClaimsRefreshToken.for_user(user)
         return Response({
-            "access": str(refresh.access_token),
+            "access": str(refresh.access_token_for(user)),
             "refresh": str(refresh),
-            "is_seller": hasattr(user, 'seller_profile'),
-            "is_verified": user.seller_profile.is_verified if hasattr(user, 'seller_profile') else False
+            "is_seller": refresh['seller_id'] is not None,
+            "is_verified": refresh['is_verified']
         }, status=status.HTTP_200_OK)
 
 
 
+class TokenRefreshView(APIView):
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def post(self, request):
+        serializer = TokenRefreshRequestSerializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError:
+            return Response(
+                {"detail": "Invalid or expired token."},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        except AuthenticationFailed as exc:
+            # The user was deleted or deactivated. Without authentication
+            # classes DRF would turn this into a 403
+            return Response({"detail": exc.detail}, status=status.HTTP_401_UNAUTHORIZED)
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
+
 class LogoutView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
         try:
             refresh_token = request.data.get('refresh')
-            token = RefreshToken(refresh_token)
+            token = ClaimsRefreshToken(refresh_token)
             token.blacklist()
             return Response(
                 {"detail": "Successfully logged out."},
@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-18 15:14
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicates(apps, schema_editor):
+    """Fold duplicate baskets and duplicate lines together so the constraints can be added."""
+    Basket = apps.get_model('basket', 'Basket')
+    BasketItem = apps.get_model('basket', 'BasketItem')
+
+    duplicated_customers = (
+        Basket.objects.values('customer_id')
+        .annotate(baskets=Count('id'), keep=Min('id'))
+        .filter(baskets__gt=1)
+    )
+    for row in duplicated_customers:
+        extra = Basket.objects.filter(customer_id=row['customer_id']).exclude(pk=row['keep'])
+        BasketItem.objects.filter(basket__in=extra).update(basket_id=row['keep'])
+        extra.delete()
+
+    duplicated_lines = (
+        BasketItem.objects.values('basket_id', 'product_id')
+        .annotate(lines=Count('id'), keep=Min('id'), total=Sum('quantity'))
+        .filter(lines__gt=1)
+    )
+    for row in duplicated_lines:
+        BasketItem.objects.filter(pk=row['keep']).update(quantity=row['total'])
+        BasketItem.objects.filter(
+            basket_id=row['basket_id'], product_id=row['product_id']
+        ).exclude(pk=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('basket', '0001_initial'),
+        ('products', '0003_product_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='basket',
+            constraint=models.UniqueConstraint(fields=('customer',), name='unique_basket_per_customer'),
+        ),
+        migrations.AddConstraint(
+            model_name='basketitem',
+            constraint=models.UniqueConstraint(fields=('basket', 'product'), name='unique_basket_product'),
+        ),
+    ]
@@ -1,23 +1,172 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Prefetch, Sum, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from products.fieldsets import ALL
 from products.models import Product
 
 
+# Line and basket totals are computed in SQL with this precision
+TOTAL_PRICE_FIELD = DecimalField(max_digits=12, decimal_places=2)
+
+
+class BasketQuerySet(models.QuerySet):
+    def with_totals(self):
+        """Annotate ``total_price`` and ``item_count`` (sum of quantities)."""
+        line_total = ExpressionWrapper(
+            F('basketitem__product__price') * F('basketitem__quantity'),
+            output_field=TOTAL_PRICE_FIELD,
+        )
+        return self.annotate(
+            total_price=Coalesce(Sum(line_total), Value(Decimal('0')), output_field=TOTAL_PRICE_FIELD),
+            item_count=Coalesce(Sum('basketitem__quantity'), 0),
+        )
+
+    def with_items(self, fieldset=ALL):
+        """Prefetch the items with their products, sellers and SQL line totals."""
+        return self.prefetch_related(Prefetch(
+            'basketitem_set',
+            queryset=BasketItem.objects.with_products(fieldset).order_by('id'),
+        ))
+
+
+class BasketItemQuerySet(models.QuerySet):
+    def add(self, basket, product_id, quantity=1):
+        """
+        Put ``quantity`` of a product in the basket, adding to an existing line.
+
+        Runs as one ``INSERT ... SELECT ... ON CONFLICT DO UPDATE`` where the
+        database supports it, so concurrent adds can't lose updates. Returns the
+        line's id, or ``None`` if the product doesn't exist.
+        """
+        connection = connections[self.db]
+        if connection.vendor in ('postgresql', 'sqlite') and connection.features.can_return_columns_from_insert:
+            qn = connection.ops.quote_name
+            table = qn(self.model._meta.db_table)
+            sql = (
+                f'INSERT INTO {table} ({qn("basket_id")}, {qn("product_id")}, {qn("quantity")}) '
+                f'SELECT %s, {qn("id")}, %s FROM {qn(Product._meta.db_table)} WHERE {qn("id")} = %s '
+                f'ON CONFLICT ({qn("basket_id")}, {qn("product_id")}) '
+                f'DO UPDATE SET {qn("quantity")} = {table}.{qn("quantity")} + excluded.{qn("quantity")} '
+                f'RETURNING {qn("id")}'
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [basket.pk, quantity, product_id])
+                row = cursor.fetchone()
+            return row[0] if row else None
+
+        # Portable fallback: atomic increment, then insert guarded by the
+        # unique constraint
+        lines = self.filter(basket=basket, product_id=product_id)
+        if not lines.update(quantity=F('quantity') + quantity):
+            if not Product.objects.using(self.db).filter(pk=product_id).exists():
+                return None
+            try:
+                with transaction.atomic(using=self.db):
+                    return self.create(basket=basket, product_id=product_id, quantity=quantity).pk
+            except IntegrityError:
+                lines.update(quantity=F('quantity') + quantity)
+        return lines.values_list('pk', flat=True).get()
+
+    def with_products(self, fieldset=ALL):
+        """
+        Items with SQL line totals and their products joined in. A
+        ``fieldset`` (products/fieldsets.py) loads only the product columns,
+        and the seller, that it selects.
+        """
+        items = self.with_line_totals()
+        if not fieldset:
+            return items.select_related('product__seller', 'product__category')
+
+        fields = fieldset.select(field.name for field in Product._meta.concrete_fields)
+        columns = ['basket', 'product', 'quantity', 'product__id']
+        for name in fields:
+            if name == 'seller':
+                columns += ['product__seller__id', 'product__seller__company_name', 'product__seller__is_verified']
+            else:
+                columns.append(f'product__{name}')
+        related = 'product__seller' if 'seller' in fields else 'product'
+        return items.select_related(related).only(*columns)
+
+    def with_line_totals(self):
+        return self.annotate(line_total=ExpressionWrapper(
+            F('product__price') * F('quantity'),
+            output_field=TOTAL_PRICE_FIELD,
+        ))
+
+
 class Basket(models.Model):
     customer = models.ForeignKey(User, on_delete=models.CASCADE)
     products = models.ManyToManyField(Product, through='BasketItem')
 
+    objects = BasketQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['customer'], name='unique_basket_per_customer'),
+        ]
+
+    def apply_operations(self, operations):
+        """
+        Apply a list of ``{'op': 'add'|'set'|'remove', 'product', 'quantity'}``
+        operations in order, using one query to read the affected lines and at
+        most one bulk delete, update and insert. Call it inside a transaction
+        that has locked the basket row.
+        """
+        # product_id -> (is_absolute, quantity); "add" stays relative to the
+        # stored line until a "set" or "remove" pins it
+        targets = {}
+        for operation in operations:
+            product_id = operation['product']
+            if operation['op'] == 'add':
+                absolute, quantity = targets.get(product_id, (False, 0))
+                targets[product_id] = (absolute, quantity + operation['quantity'])
+            elif operation['op'] == 'set':
+                targets[product_id] = (True, operation['quantity'])
+            else:
+                targets[product_id] = (True, 0)
+
+        lines = {item.product_id: item for item in self.basketitem_set.filter(product_id__in=targets)}
+        to_delete, to_update, to_create = [], [], []
+        for product_id, (absolute, quantity) in targets.items():
+            line = lines.get(product_id)
+            if not absolute and line is not None:
+                quantity += line.quantity
+            if quantity == 0:
+                if line is not None:
+                    to_delete.append(line.pk)
+            elif line is None:
+                to_create.append(BasketItem(basket=self, product_id=product_id, quantity=quantity))
+            elif line.quantity != quantity:
+                line.quantity = quantity
+                to_update.append(line)
+
+        if to_delete:
+            BasketItem.objects.filter(pk__in=to_delete).delete()
+        if to_update:
+            BasketItem.objects.bulk_update(to_update, ['quantity'])
+        if to_create:
+            BasketItem.objects.bulk_create(to_create)
+
 
 class BasketItem(models.Model):
     basket = models.ForeignKey(Basket, on_delete=models.CASCADE)
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
 
+    objects = BasketItemQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['basket', 'product'], name='unique_basket_product'),
+        ]
+
     @property
     def total_price(self):
+        # Use the SQL-computed value when the queryset annotated it
+        line_total = self.__dict__.get('line_total')
+        if line_total is not None:
+            return line_total
         return self.product.price * self.quantity
-
-
-
-
-
@@ -5,6 +5,8 @@ from products.serializers import ProductSerializer
 
 class BasketItemSerializer(serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
+    # A property, so declared to get the same string output as the basket total
+    total_price = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
 
     class Meta:
         model = BasketItem
@@ -12,11 +14,40 @@ class BasketItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['basket', 'total_price']
 
 
+class BasketItemAddSerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
+class BasketOperationSerializer(serializers.Serializer):
+    ADD, SET, REMOVE = 'add', 'set', 'remove'
+
+    op = serializers.ChoiceField(choices=[ADD, SET, REMOVE])
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0, required=False)
+
+    def validate(self, attrs):
+        if attrs['op'] == self.ADD:
+            attrs.setdefault('quantity', 1)
+            if attrs['quantity'] < 1:
+                raise serializers.ValidationError({'quantity': 'Must be at least 1 when adding.'})
+        elif attrs['op'] == self.SET and 'quantity' not in attrs:
+            raise serializers.ValidationError({'quantity': 'This field is required.'})
+        return attrs
+
+
+class BasketBatchSerializer(serializers.Serializer):
+    operations = BasketOperationSerializer(many=True, allow_empty=False, max_length=100)
+
+
 class BasketSerializer(serializers.ModelSerializer):
     items = BasketItemSerializer(source='basketitem_set', many=True, read_only=True)
+    # Annotated by Basket.objects.with_totals()
+    total_price = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    item_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Basket
-        fields = ['id', 'customer', 'items']
+        fields = ['id', 'customer', 'items', 'total_price', 'item_count']
         read_only_fields = ['customer']
 
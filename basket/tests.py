@@ -1,3 +1,207 @@
-from django.test import TestCase
+import threading
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from accounts.models import Seller
+from products.models import Product
+from .models import Basket, BasketItem
+
+
+class BasketTestCase(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(username='customer', password='x')
+        cls.seller = Seller.objects.create(
+            user=User.objects.create_user(username='seller', password='x'),
+            company_name='Acme',
+            is_verified=True,
+        )
+        cls.products = Product.objects.bulk_create([
+            Product(
+                name=f'Item {i}',
+                description='',
+                price=Decimal('2.50') + i,
+                stock=100,
+                slug=f'item-{i}',
+                seller=cls.seller,
+            )
+            for i in range(30)
+        ])
+
+    def setUp(self):
+        self.client.force_authenticate(self.customer)
+
+    def fill_basket(self, count):
+        basket, _ = Basket.objects.get_or_create(customer=self.customer)
+        BasketItem.objects.bulk_create([
+            BasketItem(basket=basket, product=product, quantity=2)
+            for product in self.products[:count]
+        ])
+
+
+class BasketViewTests(BasketTestCase):
+
+    def test_totals_are_computed_in_the_database(self):
+        self.fill_basket(3)
+        response = self.client.get(reverse('basket-detail'))
+        self.assertEqual(response.status_code, 200)
+        # (2.50 + 3.50 + 4.50) * 2
+        self.assertEqual(response.data['total_price'], '21.00')
+        self.assertEqual(response.data['item_count'], 6)
+        self.assertEqual(response.data['items'][1]['total_price'], '7.00')
+
+    def test_empty_basket_is_created(self):
+        response = self.client.get(reverse('basket-detail'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_price'], '0.00')
+        self.assertEqual(response.data['item_count'], 0)
+        self.assertEqual(response.data['items'], [])
+
+    def test_sparse_product_fields(self):
+        self.fill_basket(3)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('basket-detail'), {'fields': 'name,price'})
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('description', ' '.join(query['sql'] for query in queries))
+        self.assertEqual(response.data['items'][0]['product'], {'name': 'Item 0', 'price': '2.50'})
+        self.assertEqual(response.data['items'][0]['total_price'], '5.00')
+        self.assertEqual(response.data['total_price'], '21.00')
+
+    def test_query_count_does_not_grow_with_items(self):
+        for count in (1, 30):
+            BasketItem.objects.all().delete()
+            self.fill_basket(count)
+            # basket with totals + prefetched items
+            with self.subTest(items=count), self.assertNumQueries(2):
+                response = self.client.get(reverse('basket-detail'))
+            self.assertEqual(len(response.data['items']), count)
+
+
+class BasketItemAddTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(username='customer', password='x')
+        seller = Seller.objects.create(
+            user=User.objects.create_user(username='seller', password='x'),
+            company_name='Acme',
+        )
+        cls.product = Product.objects.create(
+            name='Lamp', description='', price=Decimal('12.00'), stock=5, seller=seller
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.customer)
+
+    def test_repeated_adds_increment_one_line(self):
+        url = reverse('basketitem-list-create')
+        self.client.post(url, {'product': self.product.pk, 'quantity': 2})
+        response = self.client.post(url, {'product': self.product.pk, 'quantity': 3})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['quantity'], 5)
+        self.assertEqual(response.data['total_price'], '60.00')
+        self.assertEqual(BasketItem.objects.count(), 1)
+
+    def test_unknown_product(self):
+        response = self.client.post(reverse('basketitem-list-create'), {'product': 999999})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'Product not found'})
+        self.assertFalse(BasketItem.objects.exists())
+
+
+# In-memory SQLite serializes connections with table locks; run against Postgres
+@skipUnlessDBFeature('test_db_allows_multiple_connections')
+class ConcurrentBasketAddTests(TransactionTestCase):
+    threads = 8
+
+    def test_parallel_adds_are_not_lost(self):
+        customer = User.objects.create_user(username='customer', password='x')
+        seller = Seller.objects.create(
+            user=User.objects.create_user(username='seller', password='x'),
+            company_name='Acme',
+        )
+        product = Product.objects.create(
+            name='Lamp', description='', price=Decimal('12.00'), stock=5, seller=seller
+        )
+        barrier = threading.Barrier(self.threads)
+        errors = []
+
+        def add_to_cart():
+            client = APIClient()
+            client.force_authenticate(customer)
+            try:
+                barrier.wait()
+                response = client.post(reverse('basketitem-list-create'), {'product': product.pk})
+                if response.status_code != 201:
+                    errors.append(response.status_code)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=add_to_cart) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Basket.objects.filter(customer=customer).count(), 1)
+        self.assertEqual(BasketItem.objects.get(product=product).quantity, self.threads)
+
+
+class BasketBatchTests(BasketTestCase):
+
+    def post_batch(self, operations):
+        return self.client.post(reverse('basket-batch'), {'operations': operations}, format='json')
+
+    def test_operations_apply_in_order(self):
+        basket = Basket.objects.create(customer=self.customer)
+        keep, drop, bump = self.products[:3]
+        BasketItem.objects.bulk_create([
+            BasketItem(basket=basket, product=keep, quantity=1),
+            BasketItem(basket=basket, product=drop, quantity=1),
+            BasketItem(basket=basket, product=bump, quantity=1),
+        ])
+        new = self.products[3]
+        response = self.post_batch([
+            {'op': 'set', 'product': keep.pk, 'quantity': 4},
+            {'op': 'remove', 'product': drop.pk},
+            {'op': 'add', 'product': bump.pk, 'quantity': 2},
+            {'op': 'add', 'product': new.pk},
+            {'op': 'add', 'product': new.pk},
+        ])
+        self.assertEqual(response.status_code, 200)
+        quantities = {item['product']['id']: item['quantity'] for item in response.data['items']}
+        self.assertEqual(quantities, {keep.pk: 4, bump.pk: 3, new.pk: 2})
+        self.assertEqual(response.data['item_count'], 9)
+
+    def test_query_count_does_not_grow_with_operations(self):
+        for count in (1, 20):
+            Basket.objects.all().delete()
+            operations = [{'op': 'add', 'product': product.pk} for product in self.products[:count]]
+            # locked basket (get + savepointed create), products, lines,
+            # one insert, basket with totals + items; plus the transaction savepoint
+            with self.subTest(operations=count), self.assertNumQueries(11):
+                response = self.post_batch(operations)
+            self.assertEqual(response.data['item_count'], count)
+
+    def test_unknown_product_rolls_back(self):
+        response = self.post_batch([
+            {'op': 'add', 'product': self.products[0].pk},
+            {'op': 'add', 'product': 999999},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['products'], [999999])
+        self.assertFalse(BasketItem.objects.exists())
+
+    def test_set_requires_quantity(self):
+        response = self.post_batch([{'op': 'set', 'product': self.products[0].pk}])
+        self.assertEqual(response.status_code, 400)
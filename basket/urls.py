@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import BasketItemListCreate, BasketItemDetail, BasketView
+from .views import BasketBatchView, BasketItemListCreate, BasketItemDetail, BasketView
 
 urlpatterns = [
     path('', BasketView.as_view(), name='basket-detail'),
+    path('batch/', BasketBatchView.as_view(), name='basket-batch'),
     path('items/', BasketItemListCreate.as_view(), name = 'basketitem-list-create'),
     path('items/<int:pk>/', BasketItemDetail.as_view(), name = 'basketitem-detail')
 ]
\ No newline at end of file
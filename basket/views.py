@@ -1,72 +1,102 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 
-from .models import Basket, BasketItem
-from .serializers import BasketItemSerializer, BasketSerializer
+from products.fieldsets import Fieldset
 from products.models import Product
+from .models import Basket, BasketItem
+from .serializers import BasketBatchSerializer, BasketItemAddSerializer, BasketItemSerializer, BasketSerializer
 
 
 class BasketView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        basket, created = Basket.objects.get_or_create(customer=request.user)
-        serializer = BasketSerializer(basket)
+        # ?fields= / ?exclude= select the fields of each line's product
+        fieldset = Fieldset.from_request(request)
+        baskets = Basket.objects.with_totals().with_items(fieldset).filter(customer=request.user)
+        basket = baskets.first()
+        if basket is None:
+            Basket.objects.get_or_create(customer=request.user)
+            basket = baskets.first()
+        serializer = BasketSerializer(basket, context={'product_fieldset': fieldset})
         return Response(serializer.data)
 
 
+class BasketBatchView(APIView):
+    """Apply several add/set/remove operations atomically and return the basket."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = BasketBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        operations = serializer.validated_data['operations']
+        product_ids = {operation['product'] for operation in operations}
+
+        with transaction.atomic():
+            # Lock the basket so concurrent batches for the same customer apply one after another
+            basket, created = Basket.objects.select_for_update().get_or_create(customer=request.user)
+            missing = product_ids - set(
+                Product.objects.filter(pk__in=product_ids).values_list('pk', flat=True)
+            )
+            if missing:
+                return Response(
+                    {"error": "Product not found", "products": sorted(missing)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            basket.apply_operations(operations)
+
+        fieldset = Fieldset.from_request(request)
+        basket = Basket.objects.with_totals().with_items(fieldset).get(pk=basket.pk)
+        return Response(BasketSerializer(basket, context={'product_fieldset': fieldset}).data)
+
+
 class BasketItemListCreate(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
         basket = get_object_or_404(Basket, customer=request.user)
-        items = basket.basketitem_set.all()
-        serializer = BasketItemSerializer(items, many=True)
+        fieldset = Fieldset.from_request(request)
+        items = basket.basketitem_set.with_products(fieldset)
+        serializer = BasketItemSerializer(items, many=True, context={'product_fieldset': fieldset})
         return Response(serializer.data)
 
     def post(self, request):
-        basket, created = Basket.objects.get_or_create(customer=request.user)
-
-        # Create a mutable copy of request.data
-        data = request.data.copy()
-        data['basket'] = basket.id
-
         # Validate required fields
-        if 'product' not in data:
+        if 'product' not in request.data:
             return Response(
                 {"error": "Product ID is required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Verify product exists
-        try:
-            product = Product.objects.get(pk=data['product'])
-        except Product.DoesNotExist:
-            return Response(
-                {"error": "Product not found"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        serializer = BasketItemSerializer(data=data)
+        serializer = BasketItemAddSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        # Check for existing item
-        existing_item = basket.basketitem_set.filter(product=product).first()
+        basket, created = Basket.objects.get_or_create(customer=request.user)
 
-        if existing_item:
-            # Update quantity if item exists
-            quantity = int(data.get('quantity', 1))
-            existing_item.quantity += quantity
-            existing_item.save()
-            serializer = BasketItemSerializer(existing_item)
-        else:
-            # Create new item
-            serializer.save(basket=basket, product=product)
+        # Insert or increment the line in one statement; None means the
+        # product doesn't exist
+        item_id = BasketItem.objects.add(
+            basket,
+            serializer.validated_data['product'],
+            serializer.validated_data['quantity']
+        )
+        if item_id is None:
+            return Response(
+                {"error": "Product not found"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        fieldset = Fieldset.from_request(request)
+        item = BasketItem.objects.with_products(fieldset).get(pk=item_id)
+        return Response(
+            BasketItemSerializer(item, context={'product_fieldset': fieldset}).data,
+            status=status.HTTP_201_CREATED
+        )
 
 
 
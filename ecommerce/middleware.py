@@ -0,0 +1,157 @@
+"""
+Per-request timing: SQL query count and time, view time and render time.
+
+Sampled requests get a ``Server-Timing`` header (shown in the browser's
+network panel) and one structured log line on the ``ecommerce.requests``
+logger. Requests slower than ``REQUEST_SLOW_THRESHOLD_MS`` are logged again
+as a warning, with the statements they ran.
+
+The phases are:
+
+* ``view``: from the view being called until it returns. It covers
+  serialization too, because DRF views build ``serializer.data`` before
+  returning the ``Response``;
+* ``render``: encoding the response body (DRF renderers, templates);
+* ``db``: the time spent in SQL, whichever phase ran it;
+* ``total``: the whole middleware stack below this one.
+
+Streaming responses (the catalog export) build their body after the view
+returns. Their ``Server-Timing`` header can only cover the time to the first
+byte; the log line is written once the body has been sent, with ``total`` and
+the query count covering the whole stream.
+
+Queries are timed with ``connection.execute_wrapper``, which works with
+``DEBUG = False`` and costs a couple of clock reads per statement. Requests
+left out by ``REQUEST_TIMING_SAMPLE_RATE`` are passed through untouched,
+and a rate of 0 takes the middleware out of the stack. Logged SQL keeps its
+placeholders; parameters are never logged.
+"""
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('ecommerce.requests')
+
+# Statements listed in a slow-request warning; the rest are only counted
+SLOW_SQL_LIMIT = 50
+
+
+class RequestTiming:
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view_start = self.view_end = self.render_end = None
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    def rendered(self, response):
+        self.render_end = time.perf_counter()
+
+    def metrics(self, end):
+        """``(name, milliseconds)`` pairs, in ``Server-Timing`` order."""
+        view_end = self.view_end or end
+        metrics = [('db', sum(duration for sql, duration in self.queries) * 1000)]
+        if self.view_start is not None:
+            metrics.append(('view', (view_end - self.view_start) * 1000))
+        if self.view_end is not None and self.render_end is not None:
+            metrics.append(('render', (self.render_end - self.view_end) * 1000))
+        metrics.append(('total', (end - self.start) * 1000))
+        return metrics
+
+
+class RequestTimingMiddleware:
+    """Put first in ``MIDDLEWARE`` so ``total`` covers the other middleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.REQUEST_TIMING_SAMPLE_RATE
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+        self.header = settings.REQUEST_TIMING_HEADER
+        self.slow_threshold = settings.REQUEST_SLOW_THRESHOLD_MS
+
+    def __call__(self, request):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timing = request._timing = RequestTiming()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timing))
+            response = self.get_response(request)
+        if response.streaming and not response.is_async:
+            self.add_header(response, timing, time.perf_counter())
+            response.streaming_content = self.stream(request, response, timing, response.streaming_content)
+        else:
+            self.report(request, response, timing, time.perf_counter())
+        return response
+
+    def stream(self, request, response, timing, content):
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timing))
+                yield from content
+        finally:
+            self.log(request, response, timing, timing.metrics(time.perf_counter()))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = getattr(request, '_timing', None)
+        if timing is not None:
+            timing.view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Called right after the view returns a response that still has to be rendered
+        timing = getattr(request, '_timing', None)
+        if timing is not None:
+            timing.view_end = time.perf_counter()
+            response.add_post_render_callback(timing.rendered)
+        return response
+
+    def report(self, request, response, timing, end):
+        metrics = self.add_header(response, timing, end)
+        self.log(request, response, timing, metrics)
+
+    def add_header(self, response, timing, end):
+        metrics = timing.metrics(end)
+        if self.header:
+            header = ', '.join(
+                f'{name};dur={ms:.1f}' + (f';desc="queries={len(timing.queries)}"' if name == 'db' else '')
+                for name, ms in metrics
+            )
+            existing = response.get('Server-Timing')
+            response['Server-Timing'] = f'{existing}, {header}' if existing else header
+        return metrics
+
+    def log(self, request, response, timing, metrics):
+        total_ms = metrics[-1][1]
+        slow = self.slow_threshold and total_ms >= self.slow_threshold
+        if not slow and not logger.isEnabledFor(logging.INFO):
+            return
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': len(timing.queries),
+            **{f'{name}_ms': round(ms, 1) for name, ms in metrics},
+        }
+        line = ' '.join(f'{key}={value}' for key, value in fields.items())
+        logger.info('request %s', line, extra={'timing': fields})
+        if slow:
+            statements = ''.join(
+                f'\n  {duration * 1000:8.1f}ms  {sql}' for sql, duration in timing.queries[:SLOW_SQL_LIMIT]
+            )
+            if len(timing.queries) > SLOW_SQL_LIMIT:
+                statements += f'\n  ... {len(timing.queries) - SLOW_SQL_LIMIT} more'
+            logger.warning('slow request %s%s', line, statements, extra={'timing': fields})
@@ -0,0 +1,33 @@
+"""
+JSON request parsing through orjson when it is installed. It pairs with
+``ecommerce.renderers.FastJSONRenderer``.
+
+orjson parses strings and numbers the same way the stdlib does, with one
+exception: integers beyond 64 bits come back as floats. Every
+``IntegerField`` rejects such a float with a 400, so invalid input is still
+refused. orjson always rejects NaN and Infinity, which matches DRF's default
+``STRICT_JSON``. A body orjson can't parse goes to the stdlib parser, so the
+client gets DRF's usual ``ParseError`` message.
+"""
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
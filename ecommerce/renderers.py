@@ -0,0 +1,62 @@
+"""
+JSON rendering through orjson when it is installed.
+
+``FastJSONRenderer`` produces the same bytes as DRF's ``JSONRenderer``.
+orjson encodes dicts, lists, strings, numbers, datetimes, dates, times and
+UUIDs natively. ``Decimal`` is checked first in the fallback hook, because
+basket and aggregate payloads carry many of them. Everything else goes to
+DRF's encoder.
+
+It falls back to the stdlib renderer in these cases:
+- orjson is not installed;
+- pretty printing or non-compact output was asked for;
+- ASCII-only output was asked for;
+- orjson cannot encode a value, such as an integer beyond 64 bits.
+
+Two differences remain, and API payloads hit neither:
+- NaN and infinity render as ``null``, where the strict stdlib encoder
+  raises;
+- floats from 1e16 up or below 1e-4 are spelled differently, e.g. ``1e16``
+  instead of ``1e+16``, but have the same value.
+"""
+import decimal
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+_encoder = JSONEncoder()
+
+
+def encode_default(obj):
+    """Types orjson doesn't know, encoded the way DRF's ``JSONEncoder`` does."""
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escaped like JSONRenderer so the output stays a strict JavaScript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -20,13 +20,15 @@ load_dotenv()  # .env faylını yükləyir
 SECRET_KEY = os.getenv('SECRET_KEY')
 
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = os.getenv('EMAIL_HOST')
 EMAIL_PORT = os.getenv('EMAIL_PORT')
 EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS')
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.getenv('EMAIL_HOST_USER')
+# Days sent and failed outbox rows are kept before prune_mail deletes them (accounts/mail.py)
+EMAIL_OUTBOX_RETENTION_DAYS = int(os.getenv('EMAIL_OUTBOX_RETENTION_DAYS', '7'))
 
 DEBUG = os.getenv('DEBUG', 'False') == 'True'
 
@@ -69,6 +71,7 @@ INSTALLED_APPS = [
     'accounts',
     'products',
     'basket',
+    'orders',
 
 
 ]
@@ -76,6 +79,7 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'ecommerce.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -125,6 +129,20 @@ DATABASES = {
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
+# PBKDF2 work factor for new and re-encoded hashes (accounts/hashers.py). 600k
+# is the OWASP minimum for PBKDF2-SHA256; existing hashes are upgraded or
+# downgraded to it on the next successful login.
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', '600000'))
+
+PASSWORD_HASHERS = [
+    'accounts.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -172,6 +190,20 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # orjson-backed JSON with a stdlib fallback (ecommerce/renderers.py, ecommerce/parsers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'ecommerce.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'ecommerce.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # Reverse proxies in front of the app. Client IPs (throttles, the login
+    # guard) come from X-Forwarded-For only when this is set; otherwise the
+    # header is ignored, as any client can forge it
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '0')),
 }
 
 
@@ -186,6 +218,44 @@ SIMPLE_JWT = {
 }
 
 
+# Failed-login tracking (accounts/login_guard.py)
+LOGIN_GUARD_ENABLED = os.getenv('LOGIN_GUARD_ENABLED', 'True') == 'True'
+LOGIN_FAILURE_WINDOW = int(os.getenv('LOGIN_FAILURE_WINDOW', '900'))
+LOGIN_MAX_FAILURES_PER_USERNAME_IP = int(os.getenv('LOGIN_MAX_FAILURES_PER_USERNAME_IP', '5'))
+LOGIN_MAX_FAILURES_PER_IP = int(os.getenv('LOGIN_MAX_FAILURES_PER_IP', '50'))
+LOGIN_BAD_CREDENTIALS_TTL = int(os.getenv('LOGIN_BAD_CREDENTIALS_TTL', '300'))
+
+# How often each process pulls newly blacklisted refresh tokens (accounts/blacklist.py)
+TOKEN_BLACKLIST_SYNC_SECONDS = int(os.getenv('TOKEN_BLACKLIST_SYNC_SECONDS', '30'))
+# How long a seller's token version is cached (accounts/tokens.py). Bumps are
+# written through, so with a per-process cache this bounds how long other
+# processes keep accepting outdated seller tokens
+TOKEN_VERSION_CACHE_SECONDS = int(os.getenv('TOKEN_VERSION_CACHE_SECONDS', '30'))
+
+# Per-request timing (ecommerce/middleware.py): share of requests measured
+# (0 to 1; 0 disables it), whether to send the Server-Timing header, and the
+# duration above which a request is logged with its SQL (0 disables that)
+REQUEST_TIMING_SAMPLE_RATE = float(os.getenv('REQUEST_TIMING_SAMPLE_RATE', '1'))
+REQUEST_TIMING_HEADER = os.getenv('REQUEST_TIMING_HEADER', 'True') == 'True'
+REQUEST_SLOW_THRESHOLD_MS = float(os.getenv('REQUEST_SLOW_THRESHOLD_MS', '500'))
+
+# Only slow requests are logged by default; INFO adds a line for every request
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'ecommerce.requests': {
+            'handlers': ['console'],
+            'level': os.getenv('REQUEST_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
 ]
@@ -197,5 +267,33 @@ CSRF_COOKIE_SECURE = False
 FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
 
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'ecommerce'),
+    }
+}
+
+# Response cache for the public catalog endpoints (products/cache.py); 0 disables it.
+# The version keys behind ETags are kept in this cache either way, so it must be
+# shared by all processes (e.g. Redis) when more than one serves the API.
+CATALOG_CACHE_ALIAS = os.getenv('CATALOG_CACHE_ALIAS', 'default')
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', '300'))
+
+# Page-number listings report the planner's row estimate instead of an exact
+# COUNT(*) above this many rows (PostgreSQL only; 0 always counts exactly)
+PAGINATION_ESTIMATE_THRESHOLD = int(os.getenv('PAGINATION_ESTIMATE_THRESHOLD', '10000'))
+# Seconds a listing's count is cached for under the catalog cache; 0 disables it
+PAGINATION_COUNT_CACHE_TIMEOUT = int(os.getenv('PAGINATION_COUNT_CACHE_TIMEOUT', '60'))
+
+# Rows per bulk_create batch for product imports
+PRODUCT_IMPORT_BATCH_SIZE = int(os.getenv('PRODUCT_IMPORT_BATCH_SIZE', '1000'))
+# Rows fetched per server-side cursor round trip for catalog exports
+PRODUCT_EXPORT_CHUNK_SIZE = int(os.getenv('PRODUCT_EXPORT_CHUNK_SIZE', '2000'))
+
+# How long a checkout holds stock before expire_reservations releases it
+ORDER_RESERVATION_MINUTES = int(os.getenv('ORDER_RESERVATION_MINUTES', '15'))
+
+
 
 
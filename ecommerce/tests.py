@@ -0,0 +1,96 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from accounts.tokens import ClaimsRefreshToken
+from .parsers import FastJSONParser
+from .renderers import FastJSONRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+
+    def assertSameBytes(self, data, accepted_media_type=None):
+        self.assertEqual(
+            FastJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type),
+        )
+
+    def test_matches_drf_renderer(self):
+        self.assertSameBytes({
+            'price': '9.99',
+            'total_price': Decimal('21.00'),
+            'line_totals': [Decimal('7.50'), Decimal('0.10')],
+            'created_at': datetime.datetime(2026, 1, 1, 12, 0, 0, 5, tzinfo=ZoneInfo('UTC')),
+            'local': datetime.datetime(2026, 1, 1, 12, tzinfo=ZoneInfo('Asia/Baku')),
+            'day': datetime.date(2026, 1, 2),
+            'id': uuid.UUID(int=1),
+            'name': 'Çay dəsti   line',
+            'nested': {1: None, 'flag': True},
+        })
+
+    def test_falls_back_for_values_orjson_rejects(self):
+        self.assertSameBytes({'big': 2 ** 70})
+        self.assertSameBytes({'a': [1, 2]}, 'application/json; indent=4')
+
+
+class FastJSONParserTests(SimpleTestCase):
+
+    def parse(self, body):
+        return FastJSONParser().parse(io.BytesIO(body))
+
+    def test_matches_drf_parser(self):
+        body = '{"quantity": 2, "price": 9.99, "name": "Çay", "items": [{"id": 9223372036854775807}]}'.encode()
+        self.assertEqual(self.parse(body), JSONParser().parse(io.BytesIO(body)))
+
+    def test_invalid_json(self):
+        for body in (b'{"quantity": }', b'{"price": NaN}'):
+            with self.subTest(body=body), self.assertRaises(ParseError):
+                self.parse(body)
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=0, REQUEST_TIMING_SAMPLE_RATE=1, REQUEST_TIMING_HEADER=True)
+class RequestTimingMiddlewareTests(TestCase):
+
+    def test_server_timing_and_log_line(self):
+        with self.assertLogs('ecommerce.requests', 'INFO') as logs:
+            response = self.client.get(reverse('products'))
+        metrics = [metric.split(';')[0] for metric in response['Server-Timing'].split(', ')]
+        self.assertEqual(metrics, ['db', 'view', 'render', 'total'])
+        # an empty catalog needs only the COUNT
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn(';desc="queries=1"', response['Server-Timing'])
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(logs.records[0].timing['path'], reverse('products'))
+        self.assertEqual(logs.records[0].timing['queries'], 1)
+
+    @override_settings(REQUEST_SLOW_THRESHOLD_MS=0.001)
+    def test_slow_request_logs_sql(self):
+        with self.assertLogs('ecommerce.requests', 'WARNING') as logs:
+            self.client.get(reverse('products'), {'page_size': 5})
+        self.assertIn('slow request method=GET', logs.output[0])
+        self.assertIn('SELECT COUNT(*)', logs.output[0])
+
+    def test_streaming_response_is_logged_after_the_body(self):
+        user = User.objects.create_user(username='alice', password='x')
+        access = ClaimsRefreshToken.for_user(user).access_token
+        with self.assertLogs('ecommerce.requests', 'INFO') as logs:
+            response = self.client.get(reverse('product-export'), HTTP_AUTHORIZATION=f'Bearer {access}')
+            # the header only covers the time to the first byte
+            self.assertIn(';desc="queries=0"', response['Server-Timing'])
+            self.assertEqual(logs.records, [])
+            b''.join(response.streaming_content)
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(logs.records[0].timing['queries'], 1)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+    def test_disabled(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('products')))
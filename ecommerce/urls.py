@@ -22,6 +22,7 @@ urlpatterns = [
     path('api/accounts/', include('accounts.urls')),
     path('api/products/', include('products.urls')),
     path('api/basket/', include('basket.urls')),
+    path('api/orders/', include('orders.urls')),
 
 ]
 
@@ -0,0 +1,5 @@
+from django.contrib import admin
+from .models import Order, OrderItem
+
+admin.site.register(Order)
+admin.site.register(OrderItem)
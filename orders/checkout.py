@@ -0,0 +1,150 @@
+"""
+Turning baskets into orders, and giving reserved stock back.
+
+Stock is taken with one conditional ``UPDATE ... SET stock = stock - n WHERE
+id = ... AND stock >= n`` per line, issued in product id order inside the
+checkout transaction. The condition makes overselling impossible without
+reading stock first, and the fixed lock order keeps two checkouts that share
+products from deadlocking. A checkout that can't get every line rolls back
+entirely.
+
+A checkout only *reserves* the stock: the order stays ``reserved`` until it is
+paid, cancelled, or swept by ``expire_reservations`` once ``expires_at``
+passes. Cancelling and expiring restore stock with a single
+``CASE``-per-product ``UPDATE`` however many orders are released.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.utils import timezone
+
+from basket.models import Basket
+from products import cache
+from products.models import Product
+from .models import Order, OrderItem
+
+
+class CheckoutError(Exception):
+    pass
+
+
+class EmptyBasket(CheckoutError):
+    pass
+
+
+class OutOfStock(CheckoutError):
+    def __init__(self, product_id):
+        super().__init__(f'Insufficient stock for product {product_id}.')
+        self.product_id = product_id
+
+
+def checkout(user, reservation_minutes=None):
+    """Reserve stock for every line of ``user``'s basket and empty it into a new order."""
+    if reservation_minutes is None:
+        reservation_minutes = settings.ORDER_RESERVATION_MINUTES
+    now = timezone.now()
+
+    with transaction.atomic():
+        basket = Basket.objects.select_for_update().filter(customer=user).first()
+        lines = [] if basket is None else list(
+            basket.basketitem_set.select_related('product').order_by('product_id')
+        )
+        if not lines:
+            raise EmptyBasket('The basket is empty.')
+
+        for line in lines:
+            taken = Product.objects.filter(pk=line.product_id, stock__gte=line.quantity).update(
+                stock=F('stock') - line.quantity,
+                updated_at=now,
+            )
+            if not taken:
+                raise OutOfStock(line.product_id)
+
+        order = Order.objects.create(
+            customer=user,
+            status=Order.RESERVED,
+            total_price=sum(line.product.price * line.quantity for line in lines),
+            expires_at=now + timedelta(minutes=reservation_minutes),
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product_id=line.product_id,
+                product_name=line.product.name,
+                price=line.product.price,
+                quantity=line.quantity,
+            )
+            for line in lines
+        ])
+        basket.basketitem_set.all().delete()
+        # QuerySet.update() sends no signals
+        cache.invalidate_products([line.product_id for line in lines])
+    return order
+
+
+def confirm(order_id, user):
+    """Mark a reserved, unexpired order as paid. Returns whether it was."""
+    return bool(Order.objects.filter(
+        pk=order_id,
+        customer=user,
+        status=Order.RESERVED,
+        expires_at__gt=timezone.now(),
+    ).update(status=Order.PAID))
+
+
+def release(orders, status):
+    """
+    Move the given reserved orders to ``status`` (cancelled or expired) and put
+    their stock back. Returns the number of orders released. Must run inside
+    a transaction.
+    """
+    orders = orders.filter(status=Order.RESERVED)
+    order_ids = list(orders.order_by('pk').values_list('pk', flat=True))
+    if not order_ids:
+        return 0
+    released = Order.objects.filter(pk__in=order_ids, status=Order.RESERVED).update(status=status)
+
+    restock = dict(
+        OrderItem.objects.filter(order_id__in=order_ids, product__isnull=False)
+        .values_list('product_id')
+        .annotate(quantity=Sum('quantity'))
+        .order_by('product_id')
+    )
+    if restock:
+        Product.objects.filter(pk__in=restock).update(
+            stock=F('stock') + Case(
+                *(When(pk=product_id, then=Value(quantity)) for product_id, quantity in restock.items()),
+                default=Value(0),
+            ),
+            updated_at=timezone.now(),
+        )
+        cache.invalidate_products(restock)
+    return released
+
+
+def cancel(order_id, user):
+    """Cancel a reserved order and restore its stock. Returns whether it was cancelled."""
+    with transaction.atomic():
+        orders = Order.objects.select_for_update().filter(pk=order_id, customer=user)
+        return bool(release(orders, Order.CANCELLED))
+
+
+def expire_reservations(now=None, batch_size=500):
+    """Expire overdue reservations in batches and restore their stock. Returns the count."""
+    now = now or timezone.now()
+    expired = 0
+    while True:
+        with transaction.atomic():
+            # skip_locked leaves orders that are being paid or cancelled right now
+            batch = Order.objects.select_for_update(skip_locked=True).filter(
+                pk__in=list(
+                    Order.objects.filter(status=Order.RESERVED, expires_at__lte=now)
+                    .order_by('pk').values_list('pk', flat=True)[:batch_size]
+                )
+            )
+            released = release(batch, Order.EXPIRED)
+        expired += released
+        if not released:
+            return expired
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from orders.checkout import expire_reservations
+
+
+class Command(BaseCommand):
+    help = "Expire reserved orders past their expires_at and return their stock. Run it periodically (e.g. from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Orders released per transaction.')
+
+    def handle(self, *args, **options):
+        expired = expire_reservations(batch_size=options['batch_size'])
+        self.stdout.write(f'Expired {expired} reservation(s).')
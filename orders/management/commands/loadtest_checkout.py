@@ -0,0 +1,119 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Sum
+
+from accounts.models import Seller
+from basket.models import Basket, BasketItem
+from orders.checkout import OutOfStock, checkout
+from orders.models import OrderItem
+from products.models import Product
+
+PREFIX = 'loadtest'
+
+
+class Command(BaseCommand):
+    help = (
+        "Run many concurrent checkouts against one hot product and report "
+        "throughput and whether stock was oversold. Creates its own users and "
+        "product and deletes them afterwards. Needs a database that serves "
+        "several connections at once (Postgres)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=200, help='Checkouts to attempt.')
+        parser.add_argument('--stock', type=int, default=50, help='Initial stock of the hot product.')
+        parser.add_argument('--quantity', type=int, default=1, help='Units per checkout.')
+        parser.add_argument('--threads', type=int, default=20)
+
+    def handle(self, *args, **options):
+        customers, product = self._setup(options)
+        try:
+            self._run(customers, product, options)
+        finally:
+            User.objects.filter(username__startswith=f'{PREFIX}-').delete()
+
+    def _setup(self, options):
+        seller = Seller.objects.create(
+            user=User.objects.create(username=f'{PREFIX}-seller'),
+            company_name=f'{PREFIX} company',
+            is_verified=True,
+        )
+        product = Product.objects.create(
+            name=f'{PREFIX} hot product',
+            description='Load test product.',
+            price=Decimal('9.99'),
+            stock=options['stock'],
+            seller=seller,
+        )
+        customers = User.objects.bulk_create([
+            User(username=f'{PREFIX}-customer-{i}') for i in range(options['customers'])
+        ])
+        baskets = Basket.objects.bulk_create([Basket(customer=customer) for customer in customers])
+        BasketItem.objects.bulk_create([
+            BasketItem(basket=basket, product=product, quantity=options['quantity'])
+            for basket in baskets
+        ])
+        return customers, product
+
+    def _run(self, customers, product, options):
+        pending = list(customers)
+        lock = threading.Lock()
+        outcomes = {'ordered': 0, 'out_of_stock': 0, 'errors': 0}
+        latencies = []
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        if not pending:
+                            return
+                        customer = pending.pop()
+                    start = time.perf_counter()
+                    try:
+                        checkout(customer)
+                        outcome = 'ordered'
+                    except OutOfStock:
+                        outcome = 'out_of_stock'
+                    except Exception as exc:
+                        outcome = 'errors'
+                        self.stderr.write(f'{type(exc).__name__}: {exc}')
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        outcomes[outcome] += 1
+                        latencies.append(elapsed)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - started
+
+        product.refresh_from_db()
+        sold = OrderItem.objects.filter(product=product).aggregate(sold=Sum('quantity'))['sold'] or 0
+        if not latencies:
+            return
+        latencies.sort()
+        self.stdout.write(
+            f"checkouts: {len(latencies)} in {duration:.2f}s "
+            f"({len(latencies) / duration:.1f}/s), "
+            f"p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+            f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms"
+        )
+        self.stdout.write(
+            f"ordered: {outcomes['ordered']}, out of stock: {outcomes['out_of_stock']}, "
+            f"errors: {outcomes['errors']}"
+        )
+        self.stdout.write(f"units sold: {sold} of {options['stock']}, stock left: {product.stock}")
+        if sold + product.stock != options['stock']:
+            self.stderr.write(self.style.ERROR('Stock mismatch: units were oversold or lost.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No oversell.'))
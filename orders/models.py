@@ -0,0 +1,53 @@
+from django.db import models
+from django.db.models import Q
+from django.contrib.auth.models import User
+from products.models import Product
+
+
+class Order(models.Model):
+    RESERVED = 'reserved'
+    PAID = 'paid'
+    CANCELLED = 'cancelled'
+    EXPIRED = 'expired'
+    STATUS_CHOICES = [
+        (RESERVED, 'Reserved'),
+        (PAID, 'Paid'),
+        (CANCELLED, 'Cancelled'),
+        (EXPIRED, 'Expired'),
+    ]
+
+    customer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=RESERVED)
+    total_price = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Stock is held for a reserved order until it is paid or this passes
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Backs the expire_reservations sweep; only reserved orders can
+            # expire, so paid and closed ones are left out of the index
+            models.Index(
+                fields=['expires_at'],
+                condition=Q(status='reserved'),
+                name='order_reserved_expires_idx',
+            ),
+            # A customer's order history, newest first
+            models.Index(fields=['customer', '-created_at', '-id'], name='order_customer_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'Order #{self.pk} ({self.status})'
+
+
+class OrderItem(models.Model):
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
+    # Name and price are copied so the order survives product edits and deletion
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, related_name='order_items')
+    product_name = models.CharField(max_length=100)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.PositiveIntegerField()
+
+    @property
+    def total_price(self):
+        return self.price * self.quantity
@@ -0,0 +1,158 @@
+import threading
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TransactionTestCase, skipUnlessDBFeature
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from accounts.models import Seller
+from basket.models import Basket, BasketItem
+from products.models import Product
+from .checkout import OutOfStock, checkout, expire_reservations
+from .models import Order
+
+
+def create_product(stock, price='10.00', name='Lamp'):
+    seller = Seller.objects.create(
+        user=User.objects.create_user(username=f'seller-{name}', password='x'),
+        company_name='Acme',
+    )
+    return Product.objects.create(name=name, description='', price=Decimal(price), stock=stock, seller=seller)
+
+
+def fill_basket(customer, *lines):
+    basket, _ = Basket.objects.get_or_create(customer=customer)
+    BasketItem.objects.bulk_create([
+        BasketItem(basket=basket, product=product, quantity=quantity) for product, quantity in lines
+    ])
+
+
+class CheckoutTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(username='customer', password='x')
+        cls.lamp = create_product(stock=5, price='10.00', name='Lamp')
+        cls.desk = create_product(stock=2, price='100.00', name='Desk')
+
+    def setUp(self):
+        self.client.force_authenticate(self.customer)
+
+    def test_checkout_reserves_stock_and_empties_basket(self):
+        fill_basket(self.customer, (self.lamp, 2), (self.desk, 1))
+        response = self.client.post(reverse('order-checkout'))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['status'], Order.RESERVED)
+        self.assertEqual(response.data['total_price'], '120.00')
+        self.assertEqual(sorted(item['total_price'] for item in response.data['items']), ['100.00', '20.00'])
+        self.lamp.refresh_from_db()
+        self.desk.refresh_from_db()
+        self.assertEqual((self.lamp.stock, self.desk.stock), (3, 1))
+        self.assertFalse(BasketItem.objects.exists())
+
+    def test_out_of_stock_rolls_back_every_line(self):
+        fill_basket(self.customer, (self.lamp, 2), (self.desk, 3))
+        response = self.client.post(reverse('order-checkout'))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['product'], self.desk.pk)
+        self.lamp.refresh_from_db()
+        self.assertEqual(self.lamp.stock, 5)
+        self.assertEqual(BasketItem.objects.count(), 2)
+        self.assertFalse(Order.objects.exists())
+
+    def test_empty_basket(self):
+        response = self.client.post(reverse('order-checkout'))
+        self.assertEqual(response.status_code, 400)
+
+    def test_cancel_restores_stock(self):
+        fill_basket(self.customer, (self.lamp, 2))
+        order = checkout(self.customer)
+        response = self.client.post(reverse('order-cancel', args=[order.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], Order.CANCELLED)
+        self.lamp.refresh_from_db()
+        self.assertEqual(self.lamp.stock, 5)
+        # A second cancel must not restore the stock again
+        response = self.client.post(reverse('order-cancel', args=[order.pk]))
+        self.assertEqual(response.status_code, 409)
+        self.lamp.refresh_from_db()
+        self.assertEqual(self.lamp.stock, 5)
+
+    def test_pay(self):
+        fill_basket(self.customer, (self.lamp, 1))
+        order = checkout(self.customer)
+        response = self.client.post(reverse('order-pay', args=[order.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], Order.PAID)
+
+    def test_expired_reservations_are_released_in_bulk(self):
+        other = User.objects.create_user(username='other', password='x')
+        fill_basket(self.customer, (self.lamp, 2), (self.desk, 1))
+        fill_basket(other, (self.lamp, 1))
+        first = checkout(self.customer)
+        second = checkout(other)
+        Order.objects.filter(pk=first.pk).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(expire_reservations(), 1)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, second.status), (Order.EXPIRED, Order.RESERVED))
+        self.lamp.refresh_from_db()
+        self.desk.refresh_from_db()
+        self.assertEqual((self.lamp.stock, self.desk.stock), (4, 2))
+
+        # An expired order can no longer be paid
+        response = self.client.post(reverse('order-pay', args=[first.pk]))
+        self.assertEqual(response.status_code, 409)
+
+    def test_orders_are_private(self):
+        fill_basket(self.customer, (self.lamp, 1))
+        order = checkout(self.customer)
+        self.client.force_authenticate(User.objects.create_user(username='other', password='x'))
+        self.assertEqual(self.client.get(reverse('order-detail', args=[order.pk])).status_code, 404)
+        self.assertEqual(self.client.post(reverse('order-cancel', args=[order.pk])).status_code, 404)
+
+
+# In-memory SQLite serializes connections with table locks; run against Postgres
+@skipUnlessDBFeature('test_db_allows_multiple_connections')
+class ConcurrentCheckoutTests(TransactionTestCase):
+    customers = 12
+    stock = 5
+
+    def test_hot_product_is_not_oversold(self):
+        product = create_product(stock=self.stock)
+        customers = [
+            User.objects.create_user(username=f'customer-{i}', password='x') for i in range(self.customers)
+        ]
+        for customer in customers:
+            fill_basket(customer, (product, 1))
+        barrier = threading.Barrier(self.customers)
+        outcomes = []
+
+        def buy(customer):
+            try:
+                barrier.wait()
+                checkout(customer)
+                outcomes.append('ordered')
+            except OutOfStock:
+                outcomes.append('out_of_stock')
+            except Exception as exc:
+                outcomes.append(exc)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=buy, args=[customer]) for customer in customers]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(outcomes.count('ordered'), self.stock)
+        self.assertEqual(outcomes.count('out_of_stock'), self.customers - self.stock)
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 0)
+        self.assertEqual(Order.objects.count(), self.stock)
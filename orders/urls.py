@@ -0,0 +1,10 @@
+from django.urls import path
+from .views import CheckoutView, OrderCancelView, OrderDetailView, OrderListView, OrderPayView
+
+urlpatterns = [
+    path('', OrderListView.as_view(), name='order-list'),
+    path('checkout/', CheckoutView.as_view(), name='order-checkout'),
+    path('<int:pk>/', OrderDetailView.as_view(), name='order-detail'),
+    path('<int:pk>/pay/', OrderPayView.as_view(), name='order-pay'),
+    path('<int:pk>/cancel/', OrderCancelView.as_view(), name='order-cancel'),
+]
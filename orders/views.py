@@ -0,0 +1,75 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status, permissions
+from django.shortcuts import get_object_or_404
+
+from . import checkout
+from .models import Order
+from .serializers import OrderSerializer
+
+
+def customer_orders(user):
+    return Order.objects.filter(customer=user).prefetch_related('items')
+
+
+class OrderListView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        orders = customer_orders(request.user).order_by('-created_at', '-id')
+        serializer = OrderSerializer(orders, many=True)
+        return Response(serializer.data)
+
+
+class CheckoutView(APIView):
+    """Turn the basket into a reserved order, taking the stock for every line."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        try:
+            order = checkout.checkout(request.user)
+        except checkout.EmptyBasket as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except checkout.OutOfStock as exc:
+            return Response(
+                {"error": str(exc), "product": exc.product_id},
+                status=status.HTTP_409_CONFLICT
+            )
+        order = customer_orders(request.user).get(pk=order.pk)
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+
+
+class OrderDetailView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        order = get_object_or_404(customer_orders(request.user), pk=pk)
+        return Response(OrderSerializer(order).data)
+
+
+class OrderPayView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        get_object_or_404(Order, pk=pk, customer=request.user)
+        if not checkout.confirm(pk, request.user):
+            return Response(
+                {"error": "Only unexpired reserved orders can be paid"},
+                status=status.HTTP_409_CONFLICT
+            )
+        order = customer_orders(request.user).get(pk=pk)
+        return Response(OrderSerializer(order).data)
+
+
+class OrderCancelView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        get_object_or_404(Order, pk=pk, customer=request.user)
+        if not checkout.cancel(pk, request.user):
+            return Response(
+                {"error": "Only reserved orders can be cancelled"},
+                status=status.HTTP_409_CONFLICT
+            )
+        order = customer_orders(request.user).get(pk=pk)
+        return Response(OrderSerializer(order).data)
@@ -0,0 +1,174 @@
+"""
+Response cache for the catalog read endpoints.
+
+Entries are invalidated through version keys instead of being deleted:
+
+* a *namespace* version (e.g. ``products``) is part of the entry key, so
+  bumping it orphans every entry built under the old version;
+* a *dependency* version (e.g. ``product:42``, ``seller:7``) is recorded in the
+  entry when it is stored and compared on every hit, so bumping it only
+  invalidates the entries that embedded that object.
+
+Deleting a category bumps ``category:<pk>``, which every product detail entry
+in that category depends on, instead of loading and bumping each product.
+Responses carry ``X-Cache: HIT`` or ``MISS``; hit rates are read from those
+rather than from counters kept in a (possibly per-process) cache.
+
+Bumping a version deletes its key; the next reader starts it again from a
+fresh ``time_ns()`` value, which never matches an older one and also tells a
+reader whether the version changed while it was building its response.
+Writes bump versions from model signals (see products/signals.py) once the
+transaction commits. Code that bypasses signals (``bulk_create``,
+``QuerySet.update``) must call the ``invalidate_*`` helpers itself.
+
+Versions are maintained even with ``CATALOG_CACHE_TIMEOUT = 0``: they cost no
+query and the conditional GET validators (products/conditional.py) are built
+from them. Like cached responses, they need ``CATALOG_CACHE_ALIAS`` to be
+shared by every process that writes to the catalog.
+"""
+import functools
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+PRODUCTS = 'products'
+CATEGORIES = 'categories'
+SELLERS = 'sellers'
+
+VERSION_PREFIX = 'catalog:version:'
+ENTRY_PREFIX = 'catalog:entry:'
+
+
+def product_key(pk):
+    return f'product:{pk}'
+
+
+def seller_key(pk):
+    return f'seller:{pk}'
+
+
+def category_key(pk):
+    return f'category:{pk}'
+
+
+def get_cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def is_enabled():
+    return settings.CATALOG_CACHE_TIMEOUT > 0
+
+
+def get_versions(names):
+    """Return the current version of each name, starting missing ones."""
+    if not names:
+        return {}
+    cache = get_cache()
+    keys = {VERSION_PREFIX + name: name for name in names}
+    found = cache.get_many(keys)
+    versions = {keys[key]: version for key, version in found.items()}
+    for key, name in keys.items():
+        if name not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[name] = cache.get(key)
+    return versions
+
+
+def bump(*names):
+    """Invalidate every entry keyed on, or depending on, the given names."""
+    if names:
+        transaction.on_commit(
+            lambda: get_cache().delete_many([VERSION_PREFIX + name for name in names])
+        )
+
+
+def invalidate_products(pks=()):
+    """Invalidate product lists and, optionally, the given products' detail entries."""
+    bump(PRODUCTS, *(product_key(pk) for pk in pks))
+
+
+def _entry_key(request, versions):
+    params = sorted(
+        (key, value) for key, values in request.query_params.lists() for value in values
+    )
+    raw = repr((request.path, params, sorted(versions.items())))
+    return ENTRY_PREFIX + hashlib.sha256(raw.encode()).hexdigest()
+
+
+def request_validators(request, namespaces):
+    """
+    ``(etag, last_modified)`` for a response that changes only when
+    ``namespaces`` are bumped, costing no query. The ETag hashes the request
+    and their versions. A version restarts no earlier than the write that
+    bumped it, so the newest one doubles as a modification time.
+    """
+    versions = get_versions(namespaces)
+    return _entry_key(request, versions)[len(ENTRY_PREFIX):], version_time(versions)
+
+
+def version_time(versions):
+    """The newest of ``versions`` as an aware datetime."""
+    return datetime.fromtimestamp(max(versions.values()) / 1e9, tz=dt_timezone.utc)
+
+
+def get_or_compute(name, key_parts, compute, namespaces=(), timeout=None):
+    """
+    Cache ``compute()`` under ``key_parts`` (any repr-stable value) and the
+    current versions of ``namespaces``; for derived data that isn't a whole
+    response. A version bump while computing changes the key, so a stale
+    result is stored under a key nobody reads again. ``timeout`` defaults to
+    ``CATALOG_CACHE_TIMEOUT``.
+    """
+    if not is_enabled():
+        return compute()
+    cache = get_cache()
+    raw = repr((name, key_parts, sorted(get_versions(namespaces).items())))
+    key = ENTRY_PREFIX + hashlib.sha256(raw.encode()).hexdigest()
+    value = cache.get(key)
+    if value is not None:
+        return value
+    value = compute()
+    cache.set(key, value, settings.CATALOG_CACHE_TIMEOUT if timeout is None else timeout)
+    return value
+
+
+def cache_response(namespaces=(), dependencies=None):
+    """
+    Cache a read-only ``APIView.get`` handler's 200 responses.
+
+    ``namespaces`` are version names baked into the key. ``dependencies`` is an
+    optional callable mapping the response data to the version names it
+    embeds; those are checked on every hit.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            if not is_enabled():
+                return method(view, request, *args, **kwargs)
+
+            cache = get_cache()
+            key = _entry_key(request, get_versions(namespaces))
+
+            entry = cache.get(key)
+            if entry is not None:
+                data, stored_versions = entry
+                if not stored_versions or get_versions(stored_versions) == stored_versions:
+                    return Response(data, headers={'X-Cache': 'HIT'})
+
+            started = time.time_ns()
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                stored_versions = get_versions(dependencies(response.data)) if dependencies else {}
+                # A version (re)started after we began reading means a write
+                # may have raced the read; don't store data that could be stale.
+                if all(version < started for version in stored_versions.values()):
+                    cache.set(key, (response.data, stored_versions), settings.CATALOG_CACHE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
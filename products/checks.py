@@ -0,0 +1,45 @@
+from django.core.checks import Error, Tags, register
+from django.db import connections
+
+# Created by migration 0003_product_search
+SQLITE_SEARCH_TRIGGERS = (
+    'products_product_fts_insert',
+    'products_product_fts_delete',
+    'products_product_fts_update',
+)
+
+
+@register(Tags.database)
+def check_search_triggers(app_configs, databases=None, **kwargs):
+    """
+    The SQLite search index is kept in sync by triggers on products_product,
+    and Django drops them whenever it rebuilds that table (e.g. for an
+    AlterField). Searches would then silently miss new and changed products.
+    """
+    errors = []
+    for alias in databases or ():
+        connection = connections[alias]
+        if connection.vendor != 'sqlite':
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') "
+                "AND name IN ('products_product_fts', %s)" % ', '.join(['%s'] * len(SQLITE_SEARCH_TRIGGERS)),
+                SQLITE_SEARCH_TRIGGERS,
+            )
+            names = {row[0] for row in cursor.fetchall()}
+        if 'products_product_fts' not in names:
+            # Migration 0003 hasn't run yet
+            continue
+        missing = [name for name in SQLITE_SEARCH_TRIGGERS if name not in names]
+        if missing:
+            errors.append(Error(
+                f"Search index triggers are missing on database '{alias}': {', '.join(missing)}.",
+                hint=(
+                    'A migration probably rebuilt products_product. Recreate them with the '
+                    'statements in products/migrations/0003_product_search.py, then rebuild '
+                    "the index: INSERT INTO products_product_fts(products_product_fts) VALUES ('rebuild')."
+                ),
+                id='products.E001',
+            ))
+    return errors
@@ -0,0 +1,88 @@
+"""
+Conditional GET (``ETag`` / ``Last-Modified`` and ``304 Not Modified``) for
+the catalog read endpoints.
+
+``conditional`` takes a validators function
+``(request, kwargs, data) -> (etag, last_modified)``. It is called twice:
+
+* before the handler, with ``data=None``, only when the client sent
+  ``If-None-Match`` or ``If-Modified-Since``. It must find the validators
+  cheaply, from cache versions or a narrow ``values()`` query, so a
+  matching request is answered with 304 before the row is loaded or
+  serialized;
+* after a 200, with the response data, to set the headers without another
+  query.
+
+List and seller validators come from cache versions
+(``cache.request_validators``) and need no query, whether or not responses
+are cached. Both headers follow every version the body depends on: a
+product's ETag and Last-Modified also move with its seller's version, and a
+list's with deletes, neither of which touches any ``updated_at``.
+"""
+import functools
+
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, quote_etag
+
+from . import cache
+from .models import Product
+
+
+def conditional(validators):
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            if request.META.get('HTTP_IF_NONE_MATCH') or request.META.get('HTTP_IF_MODIFIED_SINCE'):
+                etag, last_modified = validators(request, kwargs, None)
+                not_modified = get_conditional_response(
+                    request,
+                    etag=quote_etag(etag) if etag else None,
+                    last_modified=int(last_modified.timestamp()) if last_modified else None,
+                )
+                if not_modified is not None:
+                    return not_modified
+
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                etag, last_modified = validators(request, kwargs, response.data)
+                if etag:
+                    response['ETag'] = quote_etag(etag)
+                if last_modified:
+                    response['Last-Modified'] = http_date(last_modified.timestamp())
+            return response
+        return wrapper
+    return decorator
+
+
+def list_validators(*namespaces):
+    """Validators for a response that only depends on ``namespaces``."""
+    def validators(request, kwargs, data):
+        return cache.request_validators(request, namespaces)
+    return validators
+
+
+def seller_validators(request, kwargs, data):
+    # The seller's own version, and products for its newest products and count
+    return cache.request_validators(request, [cache.seller_key(kwargs['pk']), cache.PRODUCTS])
+
+
+def product_validators(request, kwargs, data):
+    if data is None:
+        row = (
+            Product.objects.filter(slug=kwargs['slug'])
+            .values_list('id', 'seller_id', 'updated_at')
+            .first()
+        )
+        if row is None:
+            return None, None
+        product_id, seller_id, updated_at = row
+    else:
+        product_id, seller_id = data['id'], data['seller']['id']
+        updated_at = parse_datetime(data['updated_at'])
+
+    parts = [str(product_id), str(int(updated_at.timestamp() * 1_000_000))]
+    # Seller edits show up in the embedded seller but not in updated_at
+    versions = cache.get_versions([cache.product_key(product_id), cache.seller_key(seller_id)])
+    parts.extend(str(version) for _, version in sorted(versions.items()))
+    return '-'.join(parts), max(updated_at, cache.version_time(versions))
@@ -0,0 +1,112 @@
+"""
+Streaming catalog export shared by ``ProductExportView`` and the
+``export_products`` command.
+
+Rows come from ``QuerySet.iterator(chunk_size=...)`` (a server-side cursor on
+Postgres) as plain value tuples and are encoded chunk by chunk, so neither
+the queryset nor the output is ever held in memory in full.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from rest_framework import renderers
+
+from .models import Product
+
+DEFAULT_CHUNK_SIZE = 2000
+FORMATS = ('ndjson', 'csv')
+
+# (output column, queryset field)
+COLUMNS = (
+    ('id', 'id'),
+    ('name', 'name'),
+    ('slug', 'slug'),
+    ('description', 'description'),
+    ('price', 'price'),
+    ('stock', 'stock'),
+    ('category', 'category_id'),
+    ('category_slug', 'category__slug'),
+    ('seller', 'seller_id'),
+    ('seller_company_name', 'seller__company_name'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+)
+
+
+def export_queryset(seller=None, category=None, updated_since=None):
+    """Products to export, ordered by id. ``category`` may be an id or a slug."""
+    queryset = Product.objects.order_by('id')
+    if seller is not None:
+        queryset = queryset.filter(seller_id=seller)
+    if category is not None:
+        category = str(category)
+        if category.isdigit():
+            queryset = queryset.filter(category_id=int(category))
+        else:
+            queryset = queryset.filter(category__slug=category)
+    if updated_since is not None:
+        if timezone.is_naive(updated_since):
+            updated_since = timezone.make_aware(updated_since)
+        queryset = queryset.filter(updated_at__gte=updated_since)
+    return queryset.values_list(*(field for _, field in COLUMNS))
+
+
+def _chunked(rows, chunk_size, encode):
+    buffer = []
+    for row in rows:
+        buffer.append(encode(row))
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def iter_ndjson(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    names = [name for name, _ in COLUMNS]
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    def encode(row):
+        return encoder.encode(dict(zip(names, row))) + '\n'
+
+    return _chunked(queryset.iterator(chunk_size=chunk_size), chunk_size, encode)
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the line, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in COLUMNS])
+    yield from _chunked(queryset.iterator(chunk_size=chunk_size), chunk_size, writer.writerow)
+
+
+ENCODERS = {
+    'ndjson': iter_ndjson,
+    'csv': iter_csv,
+}
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """
+    Lets content negotiation (``Accept`` or ``?format=ndjson``) select the
+    export format. Export bodies are streamed by the view; only error
+    payloads go through ``render``.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder) + '\n'
+
+
+class CSVRenderer(NDJSONRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
@@ -0,0 +1,104 @@
+"""
+Facet counts for product search (``ProductSearchView`` with ``?facets=``).
+
+Each facet is one grouped aggregate over the same filters as the results:
+``category`` and ``seller`` are ``GROUP BY`` queries capped at
+``MAX_FACET_VALUES`` rows, ``price`` is a single query with one filtered
+``COUNT`` per bucket. The result is cached per normalized filter set and
+invalidated with the catalog versions, so repeated searches cost one cache
+read.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, Q
+
+from . import cache
+from .models import Product
+from .search import filter_products
+
+FACETS = ('category', 'seller', 'price')
+MAX_FACET_VALUES = 20
+# Lower edges of the price buckets; the last bucket is open-ended
+PRICE_EDGES = tuple(Decimal(edge) for edge in (0, 10, 25, 50, 100, 250, 500, 1000))
+FILTER_PARAMS = ('search', 'min_price', 'max_price', 'category', 'seller')
+
+
+def parse_facets(value):
+    """Facet names requested by ``?facets=``: a comma list, or ``all``/``true``."""
+    value = (value or '').strip().lower()
+    if value in ('all', 'true', '1'):
+        return list(FACETS)
+    names = []
+    for name in value.split(','):
+        name = name.strip()
+        if name in FACETS and name not in names:
+            names.append(name)
+    return names
+
+
+def normalize(params):
+    # Every filter strips its value and matches case-insensitively
+    return tuple(
+        (name, params[name].strip().lower())
+        for name in FILTER_PARAMS
+        if params.get(name, '').strip()
+    )
+
+
+def category_counts(queryset):
+    rows = (
+        queryset.order_by()
+        .values('category_id', 'category__slug', 'category__name')
+        .annotate(count=Count('pk'))
+        .order_by('-count', 'category_id')[:MAX_FACET_VALUES]
+    )
+    return [
+        {'id': row['category_id'], 'slug': row['category__slug'], 'name': row['category__name'],
+         'count': row['count']}
+        for row in rows
+    ]
+
+
+def seller_counts(queryset):
+    rows = (
+        queryset.order_by()
+        .values('seller_id', 'seller__company_name')
+        .annotate(count=Count('pk'))
+        .order_by('-count', 'seller_id')[:MAX_FACET_VALUES]
+    )
+    return [
+        {'id': row['seller_id'], 'company_name': row['seller__company_name'], 'count': row['count']}
+        for row in rows
+    ]
+
+
+def price_counts(queryset):
+    buckets = list(zip(PRICE_EDGES, PRICE_EDGES[1:] + (None,)))
+    counts = queryset.order_by().aggregate(**{
+        f'bucket_{i}': Count('pk', filter=Q(price__gte=low) & (Q(price__lt=high) if high else Q()))
+        for i, (low, high) in enumerate(buckets)
+    })
+    return [
+        {'min': str(low), 'max': str(high) if high else None, 'count': counts[f'bucket_{i}']}
+        for i, (low, high) in enumerate(buckets)
+    ]
+
+
+COUNTERS = {
+    'category': category_counts,
+    'seller': seller_counts,
+    'price': price_counts,
+}
+
+
+def get_facets(params, names):
+    def compute():
+        queryset = filter_products(Product.objects.all(), params)
+        return {name: COUNTERS[name](queryset) for name in names}
+
+    return cache.get_or_compute(
+        'ProductSearchFacets',
+        (normalize(params), tuple(names)),
+        compute,
+        namespaces=[cache.PRODUCTS, cache.CATEGORIES, cache.SELLERS],
+    )
@@ -0,0 +1,62 @@
+"""
+Sparse fieldsets: ``?fields=id,name,price`` sends only the listed fields and
+``?exclude=description`` drops the listed ones. Both take comma lists of
+top-level field names and can be combined; unknown names are ignored.
+
+Endpoints turn the selection into SQL as well as output, so the columns,
+joins and aggregates behind an unselected field are not queried either:
+
+* product lists select only the needed ``values()`` columns
+  (``ProductRowSerializer.values``);
+* seller endpoints defer unused seller columns and skip unselected stats,
+  counts and embedded products;
+* basket responses apply the selection to the product of each line and
+  load those products with ``only()``.
+
+The product detail page is one cached row whose ETag and cache entry are
+built from ``id``, ``seller`` and ``updated_at``. There the full
+representation is produced and trimmed on the way out (``sparse_response``).
+"""
+import functools
+
+
+def _split(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class Fieldset:
+
+    def __init__(self, fields=None, exclude=()):
+        # None means every field
+        self.fields = set(fields) if fields is not None else None
+        self.exclude = set(exclude)
+
+    @classmethod
+    def from_request(cls, request):
+        fields = _split(request.query_params.get('fields'))
+        return cls(fields or None, _split(request.query_params.get('exclude')))
+
+    def __bool__(self):
+        return self.fields is not None or bool(self.exclude)
+
+    def __contains__(self, name):
+        return (self.fields is None or name in self.fields) and name not in self.exclude
+
+    def select(self, names):
+        """The selected names among ``names``, in their original order."""
+        return [name for name in names if name in self]
+
+
+ALL = Fieldset()
+
+
+def sparse_response(method):
+    """Trim a single-object 200 response to the request's fieldset."""
+    @functools.wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        response = method(view, request, *args, **kwargs)
+        fieldset = Fieldset.from_request(request)
+        if fieldset and response.status_code == 200:
+            response.data = {name: value for name, value in response.data.items() if name in fieldset}
+        return response
+    return wrapper
@@ -0,0 +1,204 @@
+"""
+Streaming bulk product import shared by the ``import_products`` command and
+``ProductImportView``.
+
+Rows are read lazily from a CSV or JSON-lines stream, validated a chunk at a
+time (one query per chunk for categories and explicit slugs) and written with
+``bulk_create``. Bad rows are reported by line number and skipped; memory use
+is bounded by the chunk size and ``MAX_REPORTED_ERRORS``.
+
+Byte streams are decoded as UTF-8 one line at a time, so a row with invalid
+bytes is reported like any other bad row instead of aborting the import
+halfway through the file.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.db import DatabaseError
+from rest_framework import serializers
+
+from . import cache
+from .models import Category, Product
+from .slugs import bulk_create_with_slugs
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+FORMATS = ('csv', 'jsonl')
+
+
+class ProductImportRowSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=100)
+    description = serializers.CharField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    # PositiveIntegerField's range on every supported database
+    stock = serializers.IntegerField(min_value=0, max_value=2147483647)
+    category = serializers.IntegerField(required=False, allow_null=True)
+    slug = serializers.SlugField(max_length=50, required=False, allow_blank=True)
+
+    def validate_slug(self, value):
+        if value in Product.reserved_slugs:
+            raise serializers.ValidationError('This slug is reserved.')
+        return value
+
+    def to_internal_value(self, data):
+        # CSV has no null; treat empty optional cells as missing
+        data = {key: value for key, value in data.items() if value not in ('', None)}
+        return super().to_internal_value(data)
+
+
+def guess_format(filename):
+    if filename.endswith('.csv'):
+        return 'csv'
+    if filename.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return None
+
+
+class DecodedLines:
+    """Text lines from a text or byte stream, noting which byte lines weren't valid UTF-8."""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.invalid = set()
+
+    def __iter__(self):
+        for line_number, line in enumerate(self.lines, 1):
+            if isinstance(line, bytes):
+                # utf-8-sig drops a byte order mark at the start of the file
+                encoding = 'utf-8-sig' if line_number == 1 else 'utf-8'
+                try:
+                    line = line.decode(encoding)
+                except UnicodeDecodeError:
+                    self.invalid.add(line_number)
+                    line = line.decode(encoding, 'replace')
+            yield line
+
+
+def read_rows(lines, file_format):
+    """Yield ``(line_number, data, error)`` for each record in a text or byte stream."""
+    lines = DecodedLines(lines)
+    if file_format == 'csv':
+        reader = csv.DictReader(lines)
+        reader.fieldnames  # reads the header
+        last_line = reader.line_num
+        if lines.invalid:
+            # Without readable column names no row can be matched up
+            yield last_line, None, 'Invalid UTF-8 in the header.'
+            return
+        for row in reader:
+            # A quoted value can span lines; the row is bad if any of them is
+            first_line, last_line = last_line + 1, reader.line_num
+            if lines.invalid.intersection(range(first_line, last_line + 1)):
+                yield last_line, None, 'Invalid UTF-8.'
+            else:
+                yield last_line, row, None
+        return
+
+    for line_number, line in enumerate(lines, 1):
+        if line_number in lines.invalid:
+            yield line_number, None, 'Invalid UTF-8.'
+            continue
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield line_number, None, f'Invalid JSON: {exc}'
+            continue
+        if not isinstance(data, dict):
+            yield line_number, None, 'Expected a JSON object.'
+            continue
+        yield line_number, data, None
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line, error):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': error})
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+class ProductImporter:
+    def __init__(self, seller_id, batch_size=DEFAULT_BATCH_SIZE):
+        self.seller_id = seller_id
+        self.batch_size = batch_size
+        self.report = ImportReport()
+
+    def run(self, rows):
+        rows = iter(rows)
+        try:
+            while chunk := list(islice(rows, self.batch_size)):
+                self._import_chunk(chunk)
+        finally:
+            if self.report.created:
+                # bulk_create sends no signals
+                cache.invalidate_products()
+        return self.report
+
+    def _import_chunk(self, chunk):
+        valid = []
+        for line, data, error in chunk:
+            if error:
+                self.report.add_error(line, error)
+                continue
+            serializer = ProductImportRowSerializer(data=data)
+            if serializer.is_valid():
+                valid.append((line, serializer.validated_data))
+            else:
+                self.report.add_error(line, serializer.errors)
+
+        category_ids = {row['category'] for _, row in valid if row.get('category') is not None}
+        known_categories = set(
+            Category.objects.filter(pk__in=category_ids).values_list('pk', flat=True)
+        )
+        explicit_slugs = {row['slug'] for _, row in valid if row.get('slug')}
+        taken_slugs = set(
+            Product.objects.filter(slug__in=explicit_slugs).values_list('slug', flat=True)
+        )
+
+        lines, products = [], []
+        for line, row in valid:
+            category = row.get('category')
+            slug = row.get('slug', '')
+            if category is not None and category not in known_categories:
+                self.report.add_error(line, {'category': [f'Invalid pk "{category}" - object does not exist.']})
+                continue
+            if slug and slug in taken_slugs:
+                self.report.add_error(line, {'slug': ['product with this slug already exists.']})
+                continue
+            if slug:
+                taken_slugs.add(slug)
+            lines.append(line)
+            products.append(Product(
+                name=row['name'],
+                description=row['description'],
+                price=row['price'],
+                stock=row['stock'],
+                category_id=category,
+                slug=slug,
+                seller_id=self.seller_id,
+            ))
+
+        if not products:
+            return
+        try:
+            bulk_create_with_slugs(Product, products)
+        except DatabaseError as exc:
+            for line in lines:
+                self.report.add_error(line, f'Batch rejected by the database: {exc}')
+            return
+        self.report.created += len(products)
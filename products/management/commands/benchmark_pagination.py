@@ -0,0 +1,79 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+
+from products.management.seeding import rolled_back, seed_catalog
+from products.models import Product
+from products.paginations import KeysetCursorPagination
+from products.views import ProductListCreateView
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare page-number and keyset cursor pagination latency on the product "
+        "list at page 1 and at a deep page. Seeded rows are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000,
+                            help='Number of products to seed (0 to use existing data).')
+        parser.add_argument('--page', type=int, default=10_000, help='Deep page number to measure.')
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=5, help='Requests per measurement.')
+
+    def handle(self, *args, **options):
+        with rolled_back(), override_settings(ALLOWED_HOSTS=['testserver']):
+            if options['rows']:
+                self.stdout.write(f"Seeding {options['rows']} products...")
+                seed_catalog(options['rows'])
+            self._run(options)
+
+    def _run(self, options):
+        page_size = options['page_size']
+        deep_page = options['page']
+        base = f'/api/products/?page_size={page_size}'
+
+        offset = (deep_page - 1) * page_size
+        boundary = (
+            Product.objects.order_by(*KeysetCursorPagination.ordering)
+            .values('created_at', 'id')[offset - 1:offset]
+        )
+        boundary = list(boundary)
+        if deep_page > 1 and not boundary:
+            self.stderr.write(f'Not enough rows for page {deep_page}.')
+            return
+
+        rows = [
+            ('page number', 1, f'{base}&page=1'),
+            ('page number', deep_page, f'{base}&page={deep_page}'),
+            ('cursor', 1, f'{base}&pagination=cursor'),
+        ]
+        if boundary:
+            rows.append(('cursor', deep_page, self._cursor_url(f'{base}&pagination=cursor', boundary[0])))
+
+        self.stdout.write(f"{'mode':<12} {'page':>8} {'median ms':>10} {'min ms':>10}")
+        for mode, page, url in rows:
+            timings = self._measure(url, options['repeat'])
+            self.stdout.write(
+                f'{mode:<12} {page:>8} {timings[len(timings) // 2]:>10.2f} {timings[0]:>10.2f}'
+            )
+
+    def _cursor_url(self, url, row):
+        paginator = KeysetCursorPagination()
+        paginator.base_url = f'http://testserver{url}'
+        return paginator.encode_cursor(row, reverse=False)
+
+    def _measure(self, url, repeat):
+        factory = APIRequestFactory()
+        view = ProductListCreateView.as_view()
+        timings = []
+        for _ in range(repeat):
+            request = factory.get(url)
+            start = time.perf_counter()
+            response = view(request)
+            response.render()
+            timings.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.status_code
+        return sorted(timings)
@@ -0,0 +1,87 @@
+import io
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from basket.models import Basket, BasketItem
+from basket.serializers import BasketSerializer
+from ecommerce.parsers import FastJSONParser
+from ecommerce.renderers import FastJSONRenderer, orjson
+from products.management.seeding import rolled_back, seed_catalog
+from products.models import Product
+from products.serializers import ProductRowSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's JSONRenderer/JSONParser with the orjson-backed FastJSONRenderer/"
+        "FastJSONParser on product pages and basket payloads. Seeded rows are rolled "
+        "back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000,
+                            help='Number of products to seed (0 to use existing data).')
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1_000, 10_000],
+                            help='Product page sizes to render.')
+        parser.add_argument('--basket-items', type=int, nargs='+', default=[10, 100, 500],
+                            help='Basket sizes to render.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement.')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stderr.write('orjson is not installed; FastJSONRenderer would use the stdlib path.')
+        with rolled_back():
+            if options['rows']:
+                self.stdout.write(f"Seeding {options['rows']} products...")
+                seed_catalog(options['rows'])
+            self._run(options)
+
+    def _run(self, options):
+        payloads = []
+        products = ProductRowSerializer.values(Product.objects.order_by('-created_at', '-id'))
+        for size in options['sizes']:
+            payloads.append((f'products x{size}', ProductRowSerializer(products[:size]).data))
+
+        customer = User.objects.create(username='benchmark-renderers')
+        basket = Basket.objects.create(customer=customer)
+        for size in options['basket_items']:
+            BasketItem.objects.filter(basket=basket).delete()
+            BasketItem.objects.bulk_create([
+                BasketItem(basket=basket, product_id=product_id, quantity=2)
+                for product_id in Product.objects.values_list('pk', flat=True)[:size]
+            ])
+            # total_price values are Decimals, rendered through the encoder fallback
+            data = BasketSerializer(Basket.objects.with_totals().with_items().get(pk=basket.pk)).data
+            payloads.append((f'basket x{size}', data))
+
+        repeat = options['repeat']
+        self.stdout.write(
+            f"{'payload':<18} {'KiB':>8} {'render ms':>10} {'fast ms':>10} {'parse ms':>10} {'fast ms':>10}"
+        )
+        for name, data in payloads:
+            body = JSONRenderer().render(data)
+            if FastJSONRenderer().render(data) != body:
+                self.stderr.write(f'{name}: rendered output differs.')
+                return
+            timings = [
+                self._median_ms(lambda: JSONRenderer().render(data), repeat),
+                self._median_ms(lambda: FastJSONRenderer().render(data), repeat),
+                self._median_ms(lambda: JSONParser().parse(io.BytesIO(body)), repeat),
+                self._median_ms(lambda: FastJSONParser().parse(io.BytesIO(body)), repeat),
+            ]
+            self.stdout.write(
+                f'{name:<18} {len(body) / 1024:>8.0f} ' + ' '.join(f'{ms:>10.2f}' for ms in timings)
+            )
+
+    def _median_ms(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,71 @@
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from products.management.seeding import rolled_back, seed_catalog
+from products.models import Product
+from products.serializers import ProductRowSerializer, ProductSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare ProductSerializer with the values()-based ProductRowSerializer on "
+        "product list pages: CPU time and peak traced memory for query, "
+        "serialization and JSON rendering. Seeded rows are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000,
+                            help='Number of products to seed (0 to use existing data).')
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1_000, 10_000],
+                            help='Page sizes to measure.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement.')
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            if options['rows']:
+                self.stdout.write(f"Seeding {options['rows']} products...")
+                seed_catalog(options['rows'])
+            self._run(options['sizes'], options['repeat'])
+
+    def _run(self, sizes, repeat):
+        ordered = Product.objects.order_by('-created_at', '-id')
+        renderer = JSONRenderer()
+
+        def model_page(size):
+            page = ordered.select_related('seller', 'category')[:size]
+            return renderer.render(ProductSerializer(page, many=True).data)
+
+        def values_page(size):
+            page = ProductRowSerializer.values(ordered)[:size]
+            return renderer.render(ProductRowSerializer(page).data)
+
+        self.stdout.write(f"{'serializer':<12} {'rows':>7} {'cpu ms':>10} {'peak KiB':>10}")
+        for size in sizes:
+            if model_page(size) != values_page(size):
+                self.stderr.write(f'Output differs at {size} rows.')
+                return
+            for name, render in (('model', model_page), ('values', values_page)):
+                cpu = self._cpu_ms(render, size, repeat)
+                peak = self._peak_kib(render, size)
+                self.stdout.write(f'{name:<12} {size:>7} {cpu:>10.2f} {peak:>10.0f}')
+
+    def _cpu_ms(self, render, size, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.process_time()
+            render(size)
+            timings.append((time.process_time() - start) * 1000)
+        return statistics.median(timings)
+
+    def _peak_kib(self, render, size):
+        tracemalloc.start()
+        try:
+            render(size)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak / 1024
@@ -0,0 +1,163 @@
+import json
+import re
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from products.management.seeding import rolled_back, seed_catalog
+
+# SQLite query plan lines that read a whole table: "SCAN <table>" with no
+# "USING ... INDEX" (covering-index and virtual-table scans don't count)
+SQLITE_SEQ_SCAN = re.compile(r'^SCAN (\w+)$')
+# Django aliases tables in subqueries ("accounts_seller" U0); SQLite plans name the alias
+SUBQUERY_ALIAS = re.compile(r'"(\w+)" (U\d+)\b')
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN on every SELECT the catalog endpoints issue against a seeded "
+        "dataset and report the ones that scan a table sequentially. Seeded rows "
+        "are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20_000,
+                            help='Number of products to seed (0 to use existing data).')
+        parser.add_argument('--sellers', type=int, default=50)
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--plans', action='store_true', help='Print the full plan of every query.')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            self.stderr.write(f'EXPLAIN parsing is not implemented for {connection.vendor}.')
+            return
+        # Responses must come from the database, not the catalog cache
+        with rolled_back(), override_settings(ALLOWED_HOSTS=['testserver'], CATALOG_CACHE_TIMEOUT=0):
+            if options['rows']:
+                self.stdout.write(f"Seeding {options['rows']} products...")
+                seed_catalog(options['rows'], sellers=options['sellers'], categories=options['categories'])
+            with connection.cursor() as cursor:
+                # Give the planner row estimates for the freshly seeded tables
+                cursor.execute('ANALYZE')
+            self._run(options['plans'])
+
+    def _run(self, show_plans):
+        from products.models import Category, Product
+
+        product = Product.objects.order_by('id').first()
+        if product is None:
+            self.stderr.write('No products to explain; seed some with --rows.')
+            return
+        category = Category.objects.order_by('id').first()
+        user, _ = User.objects.get_or_create(username='explain-queries')
+        client = APIClient()
+        client.force_authenticate(user)
+
+        seller_name = product.seller.company_name
+        # A recent cutoff, like an incremental sync would use
+        since = Product.objects.order_by('-updated_at').values_list('updated_at', flat=True)[0].isoformat()
+        endpoints = [
+            ('product list', '/api/products/?page=1'),
+            ('product list, deep page', '/api/products/?page=500'),
+            ('product list, cursor', '/api/products/?pagination=cursor'),
+            ('product list, cursor page 2', self._next_url(client, '/api/products/?pagination=cursor')),
+            ('product list by price', '/api/products/?pagination=cursor&ordering=price'),
+            ('product list by update', '/api/products/?pagination=cursor&ordering=-updated_at'),
+            ('product list by name', '/api/products/?pagination=cursor&ordering=name'),
+            ('product detail', f'/api/products/{product.slug}/'),
+            ('search, text', f'/api/products/search/?search={product.name.split()[-1]}'),
+            ('search, price range', '/api/products/search/?min_price=10&max_price=20'),
+            ('search, category', f'/api/products/search/?category={category.slug if category else "x"}'),
+            ('search, category and price',
+             f'/api/products/search/?category={category.slug if category else "x"}&min_price=10&max_price=20'),
+            ('search, seller id', f'/api/products/search/?seller={product.seller_id}'),
+            ('search, seller name', f'/api/products/search/?seller={seller_name}'),
+            ('search, facets', '/api/products/search/?min_price=10&max_price=500&facets=all'),
+            ('category list', '/api/products/categories/'),
+            ('seller list', '/api/products/sellers/'),
+            ('seller list by product count', '/api/products/sellers/?ordering=-product_count'),
+            ('seller detail', f'/api/products/sellers/{product.seller_id}/'),
+            ('seller products', f'/api/products/sellers/{product.seller_id}/products/'),
+            ('export, seller', f'/api/products/export/?seller={product.seller_id}'),
+            ('export, updated since', f'/api/products/export/?updated_since={since.replace("+", "%2B")}'),
+            ('order list', '/api/orders/'),
+        ]
+
+        tables = set(connection.introspection.table_names())
+        explained = flagged = 0
+        for label, url in endpoints:
+            queries = self._capture(client, url)
+            self.stdout.write(f'{label}: GET {url}')
+            for sql in queries:
+                plan, scanned = self._explain(sql)
+                scanned = [table for table in dict.fromkeys(scanned) if table in tables]
+                explained += 1
+                if scanned:
+                    flagged += 1
+                    counts = ', '.join(f'{table} ({self._row_count(table)} rows)' for table in scanned)
+                    self.stdout.write(self.style.WARNING(f'  seq scan on {counts}'))
+                    self.stdout.write(f'    {sql[:200]}')
+                if show_plans:
+                    for line in plan:
+                        self.stdout.write(f'    | {line}')
+        self.stdout.write(f'{flagged} of {explained} queries scan a table sequentially.')
+
+    def _next_url(self, client, url):
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            next_url = client.get(url).data.get('next')
+        return next_url.replace('http://testserver', '') if next_url else url
+
+    def _capture(self, client, url):
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        if response.status_code != 200:
+            self.stderr.write(f'  GET {url} returned {response.status_code}')
+        return [
+            query['sql'] for query in captured.captured_queries
+            if query['sql'].lstrip().upper().startswith(('SELECT', 'WITH'))
+        ]
+
+    def _explain(self, sql):
+        """Return the plan as text lines and the tables it scans sequentially."""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                lines, scanned = [], []
+                self._walk_postgres(plan[0]['Plan'], 0, lines, scanned)
+                return lines, scanned
+
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            details = [row[3] for row in cursor.fetchall()]
+        aliases = {alias: table for table, alias in SUBQUERY_ALIAS.findall(sql)}
+        scanned = [
+            aliases.get(match.group(1), match.group(1))
+            for match in map(SQLITE_SEQ_SCAN.match, details) if match
+        ]
+        return details, scanned
+
+    def _walk_postgres(self, node, depth, lines, scanned):
+        relation = node.get('Relation Name')
+        index = node.get('Index Name')
+        description = node['Node Type']
+        if relation:
+            description += f' on {relation}'
+        if index:
+            description += f' using {index}'
+        lines.append(f"{'  ' * depth}{description} (rows={node.get('Plan Rows')})")
+        if node['Node Type'] == 'Seq Scan':
+            scanned.append(relation)
+        for child in node.get('Plans', ()):
+            self._walk_postgres(child, depth + 1, lines, scanned)
+
+    def _row_count(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+            return cursor.fetchone()[0]
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from products.exporters import DEFAULT_CHUNK_SIZE, ENCODERS, FORMATS, export_queryset
+
+
+class Command(BaseCommand):
+    help = 'Stream the product catalog as NDJSON or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--output', default='-', help="Output file, or '-' for stdout.")
+        parser.add_argument('--seller', type=int, help='Only products of this seller id.')
+        parser.add_argument('--category', help='Only products of this category id or slug.')
+        parser.add_argument('--updated-since', help='Only products updated at or after this ISO 8601 datetime.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        updated_since = None
+        if options['updated_since']:
+            try:
+                updated_since = parse_datetime(options['updated_since'])
+            except ValueError:
+                pass
+            if updated_since is None:
+                raise CommandError('--updated-since must be an ISO 8601 datetime.')
+
+        queryset = export_queryset(
+            seller=options['seller'],
+            category=options['category'],
+            updated_since=updated_since,
+        )
+        chunks = ENCODERS[options['format']](queryset, chunk_size=options['chunk_size'])
+
+        if options['output'] == '-':
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'w', newline='', encoding='utf-8') as stream:
+            for chunk in chunks:
+                stream.write(chunk)
@@ -0,0 +1,42 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Seller
+from products.importers import DEFAULT_BATCH_SIZE, FORMATS, ProductImporter, guess_format, read_rows
+
+
+class Command(BaseCommand):
+    help = "Stream products from a CSV or JSON-lines file into a seller's catalog."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, or '-' for stdin.")
+        parser.add_argument('--seller', type=int, required=True, help='Seller id that will own the products.')
+        parser.add_argument('--format', choices=FORMATS, help='Input format (default: from the file extension).')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            seller = Seller.objects.get(pk=options['seller'])
+        except Seller.DoesNotExist:
+            raise CommandError(f"Seller {options['seller']} does not exist.")
+
+        path = options['path']
+        file_format = options['format'] or guess_format(path)
+        if file_format is None:
+            raise CommandError('Cannot tell the input format from the file name; pass --format.')
+
+        importer = ProductImporter(seller.pk, batch_size=options['batch_size'])
+        # Read bytes: read_rows decodes line by line and reports invalid UTF-8 per row
+        if path == '-':
+            report = importer.run(read_rows(sys.stdin.buffer, file_format))
+        else:
+            with open(path, 'rb') as stream:
+                report = importer.run(read_rows(stream, file_format))
+
+        for error in report.errors:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+        if report.failed > len(report.errors):
+            self.stderr.write(f'... {report.failed - len(report.errors)} more errors not shown')
+        self.stdout.write(self.style.SUCCESS(f'Created {report.created} products, {report.failed} rows failed.'))
@@ -0,0 +1,58 @@
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from accounts.models import Seller
+from products.models import Category, Product
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Run the block inside a transaction that is always rolled back."""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def seed_catalog(count, sellers=5, categories=10, batch_size=5000, prefix='seed'):
+    """
+    Bulk-insert ``count`` synthetic products spread over a few sellers and
+    categories. Used by the benchmark and diagnostics commands.
+    """
+    seller_objs = []
+    for i in range(sellers):
+        user = User.objects.create(username=f'{prefix}-seller-{i}')
+        seller_objs.append(Seller.objects.create(
+            user=user, company_name=f'{prefix} company {i}', is_verified=True
+        ))
+    category_objs = Category.objects.bulk_create([
+        Category(name=f'{prefix} category {i}', slug=f'{prefix}-category-{i}')
+        for i in range(categories)
+    ])
+
+    batch = []
+    for i in range(count):
+        batch.append(Product(
+            name=f'{prefix} product {i}',
+            description=f'Synthetic product number {i} used for benchmarking.',
+            price=Decimal(i % 1000) + Decimal('0.99'),
+            stock=i % 50,
+            slug=f'{prefix}-product-{i}',
+            seller=seller_objs[i % sellers],
+            category=category_objs[i % categories],
+        ))
+        if len(batch) >= batch_size:
+            Product.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Product.objects.bulk_create(batch)
+    return seller_objs, category_objs
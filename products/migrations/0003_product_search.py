@@ -0,0 +1,112 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The full-text index lives outside the Django model: Postgres keeps a
+# generated tsvector column with a GIN index, SQLite keeps an external-content
+# FTS5 table synchronised by triggers. See products/search.py for the queries.
+#
+# Note for SQLite: operations that make Django rebuild products_product
+# (e.g. AlterField) drop the triggers below and must recreate them;
+# `manage.py check --database default` reports missing triggers (products/checks.py).
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE products_product ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english'::regconfig, coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english'::regconfig, replace(coalesce(slug, ''), '-', ' ')), 'B') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX products_product_search_vector_idx ON products_product USING GIN (search_vector)",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS products_product_search_vector_idx",
+    "ALTER TABLE products_product DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE products_product_fts USING fts5(
+        name, slug, description,
+        content='products_product', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER products_product_fts_insert AFTER INSERT ON products_product BEGIN
+        INSERT INTO products_product_fts(rowid, name, slug, description)
+        VALUES (new.id, new.name, new.slug, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_product_fts_delete AFTER DELETE ON products_product BEGIN
+        INSERT INTO products_product_fts(products_product_fts, rowid, name, slug, description)
+        VALUES ('delete', old.id, old.name, old.slug, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_product_fts_update AFTER UPDATE OF name, slug, description
+    ON products_product BEGIN
+        INSERT INTO products_product_fts(products_product_fts, rowid, name, slug, description)
+        VALUES ('delete', old.id, old.name, old.slug, old.description);
+        INSERT INTO products_product_fts(rowid, name, slug, description)
+        VALUES (new.id, new.name, new.slug, new.description);
+    END
+    """,
+    "INSERT INTO products_product_fts(products_product_fts) VALUES ('rebuild')",
+    # bm25 column weights for (name, slug, description), used by the rank column
+    "INSERT INTO products_product_fts(products_product_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS products_product_fts_update",
+    "DROP TRIGGER IF EXISTS products_product_fts_delete",
+    "DROP TRIGGER IF EXISTS products_product_fts_insert",
+    "DROP TABLE IF EXISTS products_product_fts",
+]
+
+STATEMENTS = {
+    'postgresql': (POSTGRES_FORWARD, POSTGRES_BACKWARD),
+    'sqlite': (SQLITE_FORWARD, SQLITE_BACKWARD),
+}
+
+
+def _run(schema_editor, index):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements is None:
+        return
+    for sql in statements[index]:
+        schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    _run(schema_editor, 0)
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.CreateModel(
+            name='ProductSearchDocument',
+            fields=[
+                ('product', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='products.product')),
+                ('document', models.TextField(db_column='products_product_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'products_product_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 15:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_email_outbox'),
+        ('products', '0003_product_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['seller', '-created_at', '-id'], name='product_seller_created_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2 on 2026-10-18 15:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Trigram indexes for the substring (icontains) filters in products/search.py,
+# Postgres only. Django compiles icontains to UPPER(col::text) LIKE UPPER(%s),
+# so the indexed expression must be the same for the planner to use it.
+TRIGRAM_INDEXES = (
+    ('products_category_name_trgm_idx', 'products_category', 'name'),
+    ('products_category_slug_trgm_idx', 'products_category', 'slug'),
+    ('accounts_seller_company_name_trgm_idx', 'accounts_seller', 'company_name'),
+    ('auth_user_username_trgm_idx', 'auth_user', 'username'),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+            f'USING GIN (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_email_outbox'),
+        ('products', '0004_product_seller_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['price', 'id'], name='product_price_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['updated_at', 'id'], name='product_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['name', 'id'], name='product_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'price'], name='product_category_price_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
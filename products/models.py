@@ -1,7 +1,8 @@
 from django.db import models
-from django.utils.text import slugify
 from django.contrib.auth.models import User
 
+from .slugs import save_with_unique_slug
+
 
 
 class Category(models.Model):
@@ -10,9 +11,10 @@ class Category(models.Model):
     slug = models.SlugField(unique=True, blank=True)
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            save_with_unique_slug(self, super().save, *args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -29,13 +31,52 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)  # Added for better tracking
     updated_at = models.DateTimeField(auto_now=True)     # Added for better tracking
 
+    # Routes under /api/products/ that would shadow a product with this slug
+    reserved_slugs = frozenset({'search', 'import', 'export', 'categories', 'sellers'})
+
+    class Meta:
+        indexes = [
+            # Backs keyset pagination on the default (-created_at, -id) ordering
+            models.Index(fields=['-created_at', '-id'], name='product_created_id_idx'),
+            # Backs a seller's product pages (sellers/<pk>/products/)
+            models.Index(fields=['seller', '-created_at', '-id'], name='product_seller_created_idx'),
+            # The other keyset orderings (?ordering=price|updated_at|name); the
+            # updated_at one also serves MAX(updated_at) and export's updated_since
+            models.Index(fields=['price', 'id'], name='product_price_id_idx'),
+            models.Index(fields=['updated_at', 'id'], name='product_updated_id_idx'),
+            models.Index(fields=['name', 'id'], name='product_name_id_idx'),
+            # Search's category filter combined with a price range, and the
+            # category facet / price bucket counts
+            models.Index(fields=['category', 'price'], name='product_category_price_idx'),
+        ]
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-            # Handle potential duplicates
-            while Product.objects.filter(slug=self.slug).exists():
-                self.slug = f"{self.slug}-{Product.objects.count() + 1}"
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            save_with_unique_slug(self, super().save, *args, **kwargs)
 
     def __str__(self):
         return self.name
+
+
+class ProductSearchDocument(models.Model):
+    """
+    Read-only view of the SQLite FTS5 index over products (``products_product_fts``,
+    created by migration 0003). Lets the ORM join a product to its full-text match
+    and bm25 ``rank``; unused on Postgres, which searches a tsvector column instead.
+    """
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_document',
+    )
+    # FTS5 exposes a hidden column named after the table; MATCH is run against it
+    document = models.TextField(db_column='products_product_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'products_product_fts'
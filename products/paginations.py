@@ -1,6 +1,340 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import cache
+
+
+class EstimatedPage(Page):
+    """A page whose successor is known from one extra fetched row, not from the count."""
+
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+
+class CountingPaginator(Paginator):
+    """
+    A paginator that avoids exact ``COUNT(*)`` queries where it can.
+
+    On PostgreSQL the planner's estimate is used when it exceeds
+    ``PAGINATION_ESTIMATE_THRESHOLD``: ``pg_class.reltuples`` for unfiltered
+    querysets, the row estimate of ``EXPLAIN`` for filtered ones. Neither
+    runs the query. Smaller results, and other backends, get an exact
+    ``COUNT(*)``.
+
+    Counts are cached per query, so the same filters in any spelling share
+    one entry. Entries live for ``PAGINATION_COUNT_CACHE_TIMEOUT`` seconds
+    and are dropped when the catalog versions change.
+
+    An estimated count sets ``count_is_approximate``. Pages past the
+    estimated end are then served (empty if there are no rows) instead of
+    raising ``EmptyPage``, and ``has_next()`` comes from one extra fetched row.
+    """
+    count_namespaces = (cache.PRODUCTS, cache.CATEGORIES, cache.SELLERS)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_is_approximate = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+        timeout = settings.PAGINATION_COUNT_CACHE_TIMEOUT
+        if not (timeout and cache.is_enabled()):
+            count, self.count_is_approximate = self._compute_count()
+            return count
+        try:
+            # Ordering doesn't change the count, so it's left out of the key
+            sql, params = queryset.order_by().query.sql_with_params()
+        except EmptyResultSet:
+            # .none() or an empty __in: nothing to count or cache
+            return 0
+        count, self.count_is_approximate = cache.get_or_compute(
+            'PaginationCount', (queryset.db, sql, params), self._compute_count,
+            namespaces=self.count_namespaces, timeout=timeout,
+        )
+        return count
+
+    def _compute_count(self):
+        threshold = settings.PAGINATION_ESTIMATE_THRESHOLD
+        try:
+            estimate = self.estimate_count() if threshold else None
+        except EmptyResultSet:
+            return 0, False
+        if estimate is not None and estimate > threshold:
+            return estimate, True
+        return self.object_list.count(), False
+
+    def estimate_count(self):
+        """The planner's row estimate for the queryset, or ``None`` if the backend has none."""
+        queryset = self.object_list.order_by()
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        query = queryset.query
+        if not query.where and query.group_by is None and not query.distinct and not query.combinator:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [connection.ops.quote_name(queryset.model._meta.db_table)],
+                )
+                row = cursor.fetchone()
+            # -1 until the table is first vacuumed or analyzed
+            if row and row[0] >= 0:
+                return row[0]
+            return None
+        plan = json.loads(queryset.explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # Only the page query can tell whether an estimate undercounted
+            if self.count_is_approximate and int(number) >= 1:
+                return int(number)
+            raise
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.count_is_approximate:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        return EstimatedPage(rows[:self.per_page], number, self, len(rows) > self.per_page)
+
 
 class CustomPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+    django_paginator_class = CountingPaginator
+
+    def get_ordering_columns(self, request):
+        # Page numbers need nothing from the rows themselves
+        return ()
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_is_approximate', self.page.paginator.count_is_approximate),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_is_approximate'] = {'type': 'boolean', 'example': False}
+        return response_schema
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Keyset pagination over a composite ordering, e.g. ``(-created_at, -id)``.
+
+    Each page is fetched with ``WHERE (created_at, id) < (last_created_at, last_id)``
+    instead of an ``OFFSET``, and no ``COUNT(*)`` is issued, so page 10,000 costs
+    the same as page 1. The next/previous cursors are opaque base64 tokens that
+    hold the boundary row's ordering values and the ordering they belong to.
+    Cursors issued for another ordering, or whose values don't convert to the
+    ordering fields' types, are answered with 404.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    # The default ordering; the last field must be unique so rows never tie.
+    ordering = ('-created_at', '-id')
+    ordering_query_param = 'ordering'
+    ordering_fields = ('created_at', 'updated_at', 'price', 'name')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+
+        position, reverse = self.decode_cursor(request)
+        if position is not None:
+            position = self.load_position(queryset, position)
+            queryset = queryset.filter(self._seek_filter(position, reverse))
+
+        order_by = [self._invert(field) for field in self.ordering] if reverse else self.ordering
+        rows = list(queryset.order_by(*order_by)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.page = rows
+        if reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request):
+        requested = request.query_params.get(self.ordering_query_param, '').strip()
+        if requested.lstrip('-') in self.ordering_fields:
+            tiebreaker = '-id' if requested.startswith('-') else 'id'
+            return (requested, tiebreaker)
+        return tuple(self.ordering)
+
+    def get_ordering_columns(self, request):
+        """Columns every row must carry to encode a cursor, for ``values()`` querysets."""
+        return [field.lstrip('-') for field in self.get_ordering(request)]
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def encode_cursor(self, row, reverse):
+        payload = {
+            'o': list(self.ordering),
+            'p': [self._dump_value(self._get_value(row, field.lstrip('-'))) for field in self.ordering],
+            'r': int(reverse),
+        }
+        token = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(',', ':')).encode('ascii')
+        ).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+            position = payload['p']
+            reverse = bool(payload.get('r'))
+            ordering = payload['o']
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+        # A cursor only means something under the ordering it was issued for
+        if ordering != list(self.ordering) or not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def load_position(self, queryset, position):
+        """Convert a decoded cursor's values with the model (or annotation) fields they came from."""
+        values = []
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            if name in queryset.query.annotations:
+                model_field = queryset.query.annotations[name].output_field
+            else:
+                model_field = queryset.model._meta.get_field(name)
+            try:
+                value = model_field.to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            values.append(value)
+        return values
+
+    def _seek_filter(self, position, reverse):
+        # Lexicographic "row comes after the cursor" predicate:
+        # (a > x) OR (a = x AND b > y) OR ...
+        # prefixed with a plain range bound on the leading column (a >= x) so
+        # the planner can turn it into an index range scan.
+        seek = Q()
+        equal = Q()
+        bound = None
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            if bound is None:
+                bound = Q(**{'%s__%s' % (name, 'lte' if descending else 'gte'): value})
+            seek |= equal & Q(**{'%s__%s' % (name, 'lt' if descending else 'gt'): value})
+            equal &= Q(**{name: value})
+        return bound & seek
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    @staticmethod
+    def _get_value(row, field):
+        if isinstance(row, dict):
+            return row[field]
+        return getattr(row, field)
+
+    @staticmethod
+    def _dump_value(value):
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+
+def get_paginator(request, cursor_class=KeysetCursorPagination, page_class=CustomPagination):
+    """
+    Pick the pagination mode for a request: keyset cursors when the client asks
+    for them (``?pagination=cursor`` or an existing ``?cursor=`` token), page
+    numbers otherwise.
+    """
+    params = request.query_params
+    if params.get('pagination') == 'cursor' or cursor_class.cursor_query_param in params:
+        return cursor_class()
+    return page_class()
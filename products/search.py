@@ -0,0 +1,155 @@
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import connections
+from django.db.models import F, Lookup, Q
+from django.db.models.expressions import RawSQL
+
+from accounts.models import Seller
+from .models import Category, ProductSearchDocument
+
+
+class SearchBackend:
+    """
+    Filters a Product queryset by a free-text query and annotates each row
+    with ``search_rank`` (higher is more relevant).
+    """
+    rank_ordering = ('-search_rank', '-id')
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+
+class ContainsSearchBackend(SearchBackend):
+    """Unindexed ``icontains`` matching; used for databases without full-text support."""
+    rank_ordering = ('-id',)
+
+    def search(self, queryset, query):
+        return queryset.filter(
+            Q(name__icontains=query) |
+            Q(description__icontains=query) |
+            Q(slug__icontains=query)
+        ).order_by(*self.rank_ordering)
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    Matches against the ``search_vector`` tsvector column (a generated column
+    covered by a GIN index, see migration 0003) and ranks with ``ts_rank``.
+    """
+    config = 'english'
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+
+        vector = RawSQL('"products_product"."search_vector"', [], output_field=SearchVectorField())
+        search_query = SearchQuery(query, config=self.config, search_type='websearch')
+        return (
+            queryset
+            .alias(document=vector)
+            .filter(document=search_query)
+            .annotate(search_rank=SearchRank(vector, search_query))
+            .order_by(*self.rank_ordering)
+        )
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """
+    Joins the ``products_product_fts`` FTS5 table (kept in sync by triggers,
+    see migration 0003) and ranks by its bm25 ``rank`` column.
+
+    Matches whole words and word prefixes ("widg" finds "Widget"), but not
+    text inside a word ("idget" doesn't), unlike ``ContainsSearchBackend``.
+    """
+
+    def search(self, queryset, query):
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return queryset.none()
+        # Quote every term so user input can't inject FTS5 syntax; the trailing
+        # * turns each into a prefix match, close to the old icontains feel.
+        match = ' '.join('"%s"*' % term for term in terms)
+        # bm25 is "lower is better"; negate it so every backend sorts rank descending
+        return (
+            queryset
+            .filter(search_document__document__match=match)
+            .annotate(search_rank=-F('search_document__rank'))
+            .order_by(*self.rank_ordering)
+        )
+
+
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return '%s MATCH %s' % (lhs, rhs), (*lhs_params, *rhs_params)
+
+
+ProductSearchDocument._meta.get_field('document').register_lookup(Match)
+
+
+BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+
+
+def get_search_backend(using='default'):
+    return BACKENDS.get(connections[using].vendor, ContainsSearchBackend)()
+
+
+def parse_price(value):
+    """
+    A price filter value as a ``Decimal``, or ``None`` when it isn't a finite
+    number; bad values are ignored rather than rejected.
+    """
+    try:
+        price = Decimal(value)
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return price if price.is_finite() else None
+
+
+def filter_products(queryset, params, backend=None):
+    """
+    Apply the product search parameters (``search``, ``min_price``,
+    ``max_price``, ``category``, ``seller``) from a query dict. Shared by the
+    search results and their facet counts so both always see the same rows.
+    """
+    min_price = parse_price(params.get('min_price', '').strip())
+    max_price = parse_price(params.get('max_price', '').strip())
+    category = params.get('category', '').strip()
+    seller = params.get('seller', '').strip()
+
+    filters = Q()
+    if min_price is not None:
+        filters &= Q(price__gte=min_price)
+    if max_price is not None:
+        filters &= Q(price__lte=max_price)
+
+    # Name matches are resolved to ids in a subquery so the database can look
+    # the products up by foreign key instead of scanning them and testing the
+    # joined names row by row. On Postgres the substring matches use the
+    # trigram indexes from migration 0005.
+    if category:
+        filters &= Q(category__in=Category.objects.filter(
+            Q(slug__icontains=category) | Q(name__icontains=category)
+        ).values('pk'))
+
+    if seller:
+        if seller.isdigit():
+            filters &= Q(seller__id=int(seller))
+        else:
+            # A UNION rather than an OR across the seller/user join, so each
+            # half can use its own index
+            filters &= Q(seller__in=Seller.objects.filter(company_name__icontains=seller).values('pk').union(
+                Seller.objects.filter(user__username__icontains=seller).values('pk')
+            ))
+
+    queryset = queryset.filter(filters)
+    search_query = params.get('search', '').strip()
+    if search_query:
+        queryset = (backend or get_search_backend()).search(queryset, search_query)
+    return queryset
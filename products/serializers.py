@@ -1,7 +1,25 @@
 from rest_framework import serializers
+from .fieldsets import ALL
 from .models import Product, Category
 from accounts.models import Seller
-from .paginations import CustomPagination
+
+
+class SparseFieldsMixin:
+    """
+    Drops the fields left out by the ``Fieldset`` (products/fieldsets.py)
+    stored under ``fieldset_context`` in the serializer context. Nested
+    serializers read the root's context, so a basket can pass a selection
+    down to its products.
+    """
+    fieldset_context = None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.context.get(self.fieldset_context)
+        if fieldset:
+            fields = {name: field for name, field in fields.items() if name in fieldset}
+        return fields
+
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -18,12 +36,38 @@ class SellerSerializer(serializers.ModelSerializer):
 
 
 
-class SellerDetailSerializer(serializers.ModelSerializer):
+class SellerStatsSerializer(SparseFieldsMixin, SellerSerializer):
+    """Seller directory entry; the stats are annotated by ``SellerListView``."""
+    fieldset_context = 'seller_fieldset'
+
+    product_count = serializers.IntegerField(read_only=True)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    total_stock = serializers.IntegerField(read_only=True)
+    last_product_update = serializers.DateTimeField(read_only=True)
+
+    class Meta(SellerSerializer.Meta):
+        fields = SellerSerializer.Meta.fields + [
+            'product_count',
+            'min_price',
+            'max_price',
+            'total_stock',
+            'last_product_update',
+        ]
+
+
+
+class SellerDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Seller with its ``products_limit`` newest products; the full catalog is
+    paged through ``sellers/<pk>/products/``. Expects ``total_products`` to be
+    annotated on the seller unless the fieldset leaves it out.
+    """
+    products_limit = 10
+    fieldset_context = 'seller_fieldset'
+
     products = serializers.SerializerMethodField()
-    total_products = serializers.IntegerField(
-        source='products.count',
-        read_only=True
-    )
+    total_products = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Seller
@@ -37,25 +81,125 @@ class SellerDetailSerializer(serializers.ModelSerializer):
         ]
 
     def get_products(self, obj):
-        request = self.context.get('request')
-        products = obj.products.all()
+        # The related manager hands every product this seller instance, so
+        # the nested seller costs no queries
+        products = (
+            obj.products.select_related('category')
+            .order_by('-created_at', '-id')[:self.products_limit]
+        )
+        return ProductSerializer(products, many=True).data
 
-        # Return unpaginated if no request or page parameter
-        if not request or 'page' not in request.query_params:
-            return ProductSerializer(products, many=True).data
 
-        # Handle pagination
-        paginator = CustomPagination()
-        result_page = paginator.paginate_queryset(products, request)
-        serializer = ProductSerializer(result_page, many=True)
-        return paginator.get_paginated_response(serializer.data).data
 
-
-
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     seller = SellerSerializer(read_only=True)
+    fieldset_context = 'product_fieldset'
 
     class Meta:
         model = Product
         fields = '__all__'
-        read_only_fields = ['seller']
\ No newline at end of file
+        read_only_fields = ['seller']
+
+    def validate_slug(self, value):
+        if value in Product.reserved_slugs:
+            raise serializers.ValidationError('This slug is reserved.')
+        return value
+
+
+
+class ProductRowSerializer:
+    """
+    Read-only fast path for product lists: renders the same dicts as
+    ``ProductSerializer(many=True).data`` from ``values()`` rows, without
+    model instances or per-field serializer dispatch. Query with
+    ``ProductRowSerializer.values(queryset)``; the seller columns are joined
+    in the same query.
+
+    Pass the same ``fieldset`` (see products/fieldsets.py) to ``values`` and
+    the serializer to select only the columns, and send only the fields, the
+    client asked for.
+
+    Prices and timestamps still go through ``ProductSerializer``'s own fields
+    so number and date formatting settings apply exactly as they do there.
+    """
+    # Output field -> the values() columns it is built from, in
+    # ProductSerializer's field order
+    field_columns = {
+        'id': ('id',),
+        'seller': ('seller_id', 'seller__company_name', 'seller__is_verified'),
+        'name': ('name',),
+        'description': ('description',),
+        'price': ('price',),
+        'stock': ('stock',),
+        'slug': ('slug',),
+        'created_at': ('created_at',),
+        'updated_at': ('updated_at',),
+        'category': ('category_id',),
+    }
+    columns = tuple(column for columns in field_columns.values() for column in columns)
+
+    def __init__(self, rows, fieldset=ALL):
+        self.rows = rows
+        self.fieldset = fieldset
+
+    @classmethod
+    def values(cls, queryset, *extra, fieldset=ALL):
+        """
+        ``queryset`` as rows for this serializer; ``extra`` adds columns,
+        e.g. the ones a cursor paginator reads.
+        """
+        columns = [column for name in fieldset.select(cls.field_columns) for column in cls.field_columns[name]]
+        return queryset.values(*dict.fromkeys(['id', *columns, *extra]))
+
+    @property
+    def data(self):
+        fields = ProductSerializer().fields
+        for name in ('created_at', 'updated_at'):
+            # Resolve the active timezone once per page instead of per value;
+            # these field instances are private to this call
+            if not hasattr(fields[name], 'timezone'):
+                fields[name].timezone = fields[name].default_timezone()
+        price = fields['price'].to_representation
+        created_at = fields['created_at'].to_representation
+        updated_at = fields['updated_at'].to_representation
+
+        if self.fieldset:
+            builders = {
+                'id': lambda row: row['id'],
+                'seller': lambda row: {
+                    'id': row['seller_id'],
+                    'company_name': row['seller__company_name'],
+                    'is_verified': row['seller__is_verified'],
+                },
+                'name': lambda row: row['name'],
+                'description': lambda row: row['description'],
+                'price': lambda row: price(row['price']),
+                'stock': lambda row: row['stock'],
+                'slug': lambda row: row['slug'],
+                'created_at': lambda row: created_at(row['created_at']),
+                'updated_at': lambda row: updated_at(row['updated_at']),
+                'category': lambda row: row['category_id'],
+            }
+            selected = [(name, builders[name]) for name in self.fieldset.select(self.field_columns)]
+            return [{name: build(row) for name, build in selected} for row in self.rows]
+
+        # Key order matches ProductSerializer's field order
+        return [
+            {
+                'id': row['id'],
+                'seller': {
+                    'id': row['seller_id'],
+                    'company_name': row['seller__company_name'],
+                    'is_verified': row['seller__is_verified'],
+                },
+                'name': row['name'],
+                'description': row['description'],
+                'price': price(row['price']),
+                'stock': row['stock'],
+                'slug': row['slug'],
+                'created_at': created_at(row['created_at']),
+                'updated_at': updated_at(row['updated_at']),
+                'category': row['category_id'],
+            }
+            for row in self.rows
+        ]
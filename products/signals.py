@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from accounts.models import Seller
+from . import cache
+from .models import Category, Product
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_product(sender, instance, **kwargs):
+    cache.invalidate_products([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    cache.bump(cache.CATEGORIES)
+
+
+@receiver(pre_delete, sender=Category)
+def invalidate_category_products(sender, instance, **kwargs):
+    # Deleting a category nulls Product.category with a bulk UPDATE, which
+    # sends no Product signals; detail entries depend on the category's version.
+    cache.bump(cache.PRODUCTS, cache.category_key(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Seller)
+def invalidate_seller(sender, instance, **kwargs):
+    # Product payloads embed the seller, so lists go too.
+    cache.bump(cache.SELLERS, cache.PRODUCTS, cache.seller_key(instance.pk))
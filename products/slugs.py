@@ -0,0 +1,105 @@
+"""
+Unique slug allocation for models with a ``slug = SlugField(unique=True)``.
+
+The database's unique constraint is the source of truth: a save simply tries
+the plain slug and, only if that insert collides, retries with a short random
+suffix. The common case therefore costs no extra query, and concurrent
+creators can never end up with the same slug.
+
+A model can list ``reserved_slugs``, such as route words that share its
+detail URL's prefix. Those always get a suffix.
+"""
+from django.db import IntegrityError, router, transaction
+from django.utils.crypto import get_random_string
+from django.utils.text import slugify
+
+SUFFIX_LENGTH = 6
+SUFFIX_CHARS = 'abcdefghijklmnopqrstuvwxyz0123456789'
+MAX_ATTEMPTS = 5
+
+
+def reserved_slugs(model):
+    return getattr(model, 'reserved_slugs', frozenset())
+
+
+def base_slug(instance, source_field='name'):
+    max_length = instance._meta.get_field('slug').max_length
+    slug = slugify(getattr(instance, source_field))[:max_length].strip('-')
+    return slug or instance._meta.model_name
+
+
+def suffixed_slug(instance, base):
+    max_length = instance._meta.get_field('slug').max_length
+    suffix = get_random_string(SUFFIX_LENGTH, SUFFIX_CHARS)
+    return '%s-%s' % (base[:max_length - SUFFIX_LENGTH - 1].strip('-'), suffix)
+
+
+def save_with_unique_slug(instance, save, *args, **kwargs):
+    """
+    Call ``save`` after giving ``instance`` a slug derived from its name,
+    retrying with a suffixed slug if the insert hits the unique constraint.
+    """
+    model = type(instance)
+    using = kwargs.get('using') or router.db_for_write(model, instance=instance)
+    base = base_slug(instance)
+    instance.slug = base if base not in reserved_slugs(model) else suffixed_slug(instance, base)
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            # The savepoint keeps a collision from aborting an outer transaction
+            with transaction.atomic(using=using):
+                return save(*args, **kwargs)
+        except IntegrityError:
+            taken = model._default_manager.using(using).filter(slug=instance.slug).exists()
+            if attempt == MAX_ATTEMPTS or not taken:
+                raise
+            instance.slug = suffixed_slug(instance, base)
+
+
+def allocate_slugs(model, instances, using=None):
+    """
+    Fill in the slug of every instance in a batch that lacks one, ready for
+    ``bulk_create``. Costs one indexed query for the whole batch; collisions
+    with existing rows or within the batch get a random suffix. A concurrent
+    insert can still claim a slug first, so use ``bulk_create_with_slugs``
+    to retry in that case.
+    """
+    pending = [instance for instance in instances if not instance.slug]
+    bases = {id(instance): base_slug(instance) for instance in pending}
+    taken = set(
+        model._default_manager.using(using or router.db_for_write(model))
+        .filter(slug__in=set(bases.values()))
+        .values_list('slug', flat=True)
+    )
+    taken.update(instance.slug for instance in instances if instance.slug)
+    taken.update(reserved_slugs(model))
+    for instance in pending:
+        slug = bases[id(instance)]
+        while slug in taken:
+            slug = suffixed_slug(instance, bases[id(instance)])
+        instance.slug = slug
+        taken.add(slug)
+    return pending
+
+
+def bulk_create_with_slugs(model, instances, batch_size=None, using=None):
+    """
+    ``bulk_create`` that allocates missing slugs and retries if it loses a race
+    for one. Other integrity errors (a missing foreign key, say) are raised
+    straight away.
+    """
+    using = using or router.db_for_write(model)
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        allocated = allocate_slugs(model, instances, using=using)
+        try:
+            with transaction.atomic(using=using):
+                return model._default_manager.using(using).bulk_create(instances, batch_size=batch_size)
+        except IntegrityError:
+            if attempt == MAX_ATTEMPTS or not allocated:
+                raise
+            taken = model._default_manager.using(using).filter(
+                slug__in=[instance.slug for instance in allocated]
+            ).exists()
+            if not taken:
+                raise
+            for instance in allocated:
+                instance.slug = ''
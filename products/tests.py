@@ -1,2 +1,886 @@
+import base64
+import csv
+import io
+import json
+import tempfile
+from decimal import Decimal
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlsplit
 
+from django.contrib.auth.models import User
+from django.core.cache import cache as default_cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DataError, IntegrityError, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import parse_http_date
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
 
+from accounts.models import Seller
+from accounts.tokens import ClaimsRefreshToken, set_token_version
+from . import cache, slugs
+from .checks import check_search_triggers
+from .importers import ProductImporter, read_rows
+from .models import Category, Product
+from .paginations import CountingPaginator
+from .serializers import ProductRowSerializer, ProductSerializer
+
+
+class CatalogFixtureMixin:
+    """Spreads products over several sellers so per-row relation loads would show up."""
+    sellers = 4
+
+    @classmethod
+    def create_catalog(cls, count):
+        category = Category.objects.create(name='Widgets', slug='widgets')
+        sellers = [
+            Seller.objects.create(
+                user=User.objects.create_user(username=f'seller{i}', password='x'),
+                company_name=f'Company {i}',
+                is_verified=True,
+            )
+            for i in range(cls.sellers)
+        ]
+        Product.objects.bulk_create([
+            Product(
+                name=f'Widget {i}',
+                description='A widget',
+                price=Decimal('9.99'),
+                stock=10,
+                slug=f'widget-{i}',
+                category=category,
+                seller=sellers[i % cls.sellers],
+            )
+            for i in range(count)
+        ])
+        return category, sellers
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=0)
+class QueryBudgetTestCase(APITestCase):
+    """
+    Pins the number of SQL queries an endpoint may issue. ``assertQueryBudget``
+    requests every page size given and requires the same fixed count for each,
+    so an N+1 regression fails no matter how the budget was chosen. The
+    response cache is off so the database path is what gets measured.
+    """
+    page_sizes = (5, 50)
+
+    def assertQueryBudget(self, budget, url, params=None, page_sizes=None):
+        for page_size in page_sizes or self.page_sizes:
+            query = dict(params or {}, page_size=page_size)
+            with self.subTest(url=url, **query), self.assertNumQueries(budget):
+                response = self.client.get(url, query)
+            self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+
+class ProductQueryBudgetTests(CatalogFixtureMixin, QueryBudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category, cls.sellers = cls.create_catalog(60)
+
+    def test_product_list(self):
+        # COUNT + page
+        response = self.assertQueryBudget(2, reverse('products'))
+        self.assertEqual(len(response.data['results']), 50)
+
+    def test_product_list_cursor(self):
+        response = self.assertQueryBudget(1, reverse('products'), {'pagination': 'cursor'})
+        self.assertEqual(len(response.data['results']), 50)
+
+    def test_product_search(self):
+        # COUNT + page
+        self.assertQueryBudget(2, reverse('product-filter'), {'search': 'widget'})
+        self.assertQueryBudget(2, reverse('product-filter'), {'seller': 'company'})
+
+    def test_product_search_name_filters(self):
+        url = reverse('product-filter')
+        # seller by company name or username, category by slug or name
+        self.assertEqual(self.client.get(url, {'seller': 'company 2'}).data['count'], 15)
+        self.assertEqual(self.client.get(url, {'seller': 'SELLER3'}).data['count'], 15)
+        self.assertEqual(self.client.get(url, {'category': 'idget'}).data['count'], 60)
+        self.assertEqual(self.client.get(url, {'category': 'gadget'}).data['count'], 0)
+
+    def test_product_search_facets(self):
+        # results as above + one grouped query per facet
+        response = self.assertQueryBudget(5, reverse('product-filter'), {'search': 'widget', 'facets': 'all'})
+        facets = response.data['facets']
+        self.assertEqual(facets['category'], [
+            {'id': self.category.pk, 'slug': 'widgets', 'name': 'Widgets', 'count': 60},
+        ])
+        self.assertEqual(sorted(row['count'] for row in facets['seller']), [15, 15, 15, 15])
+        self.assertEqual(facets['price'][0], {'min': '0', 'max': '10', 'count': 60})
+
+    @override_settings(CATALOG_CACHE_TIMEOUT=60)
+    def test_product_search_facets_are_cached(self):
+        cache.get_cache().clear()
+        params = {'seller': 'Company 1', 'facets': 'seller'}
+        self.client.get(reverse('product-filter'), params)
+        # the same filters, normalized, read the facets from the cache
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('product-filter'), dict(params, seller=' company 1 '))
+        self.assertEqual(response.data['facets']['seller'][0]['count'], 15)
+
+    @override_settings(CATALOG_CACHE_TIMEOUT=60)
+    def test_product_search_count_is_cached(self):
+        cache.get_cache().clear()
+        url = reverse('product-filter')
+        self.client.get(url, {'seller': 'company 1', 'page_size': 5})
+        # another page and page size of the same filters reuse the count
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'seller': 'company 1', 'page_size': 10, 'page': 2})
+        self.assertEqual(response.data['count'], 15)
+        self.assertIs(response.data['count_is_approximate'], False)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.filter(seller=self.sellers[1]).first().delete()
+        self.assertEqual(self.client.get(url, {'seller': 'company 1'}).data['count'], 14)
+
+    def test_product_search_matching_nothing(self):
+        # a query with no search terms filters with .none(), which has no SQL to count or cache
+        for timeout in (0, 60):
+            with self.subTest(timeout=timeout), override_settings(CATALOG_CACHE_TIMEOUT=timeout):
+                response = self.client.get(reverse('product-filter'), {'search': '"'})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual((response.data['count'], response.data['results']), (0, []))
+
+    def test_product_search_ignores_bad_prices(self):
+        total = Product.objects.count()
+        for value in ('abc', 'NaN', 'inf', '-Infinity'):
+            for param in ('min_price', 'max_price'):
+                with self.subTest(param=param, value=value):
+                    response = self.client.get(reverse('product-filter'), {param: value, 'facets': 'all'})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response.data['count'], total)
+        # out of the float range, but a valid bound
+        response = self.client.get(reverse('product-filter'), {'min_price': '1e400', 'facets': 'all'})
+        self.assertEqual(response.data['count'], 0)
+
+    @override_settings(PAGINATION_ESTIMATE_THRESHOLD=100)
+    def test_product_search_estimated_count(self):
+        url = reverse('product-filter')
+        with mock.patch.object(CountingPaginator, 'estimate_count', return_value=500):
+            # estimate + page with one extra row; no COUNT
+            response = self.assertQueryBudget(1, url, {'search': 'widget'})
+            self.assertEqual(response.data['count'], 500)
+            self.assertIs(response.data['count_is_approximate'], True)
+            self.assertIsNotNone(response.data['next'])
+
+            response = self.client.get(url, {'search': 'widget', 'page_size': 50, 'page': 2})
+            self.assertEqual(len(response.data['results']), 10)
+            self.assertIsNone(response.data['next'])
+            # past the real rows, and past the estimated end, pages are empty rather than 404
+            for page in (5, 20):
+                response = self.client.get(url, {'search': 'widget', 'page_size': 50, 'page': page})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['results'], [])
+
+        with mock.patch.object(CountingPaginator, 'estimate_count', return_value=80):
+            response = self.client.get(url, {'search': 'widget'})
+        # estimates under the threshold are replaced by the exact count
+        self.assertEqual(response.data['count'], 60)
+        self.assertIs(response.data['count_is_approximate'], False)
+
+    def test_product_detail(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('product_detail', args=['widget-1']))
+        self.assertEqual(response.status_code, 200)
+
+    def test_seller_detail(self):
+        url = reverse('seller-detail', args=[self.sellers[0].pk])
+        # seller with annotated count + newest products
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.data['total_products'], 15)
+        self.assertEqual(len(response.data['products']), 10)
+
+    def test_product_detail_not_modified(self):
+        url = reverse('product_detail', args=['widget-1'])
+        response = self.client.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        # validators only; the product isn't loaded or serialized
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        Product.objects.get(slug='widget-1').save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_product_detail_changes_with_its_seller(self):
+        url = reverse('product_detail', args=['widget-1'])
+        etag = self.client.get(url)['ETag']
+        seller = Seller.objects.get(products__slug='widget-1')
+        seller.company_name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            seller.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['seller']['company_name'], 'Renamed')
+
+    def test_seller_detail_not_modified(self):
+        url = reverse('seller-detail', args=[self.sellers[0].pk])
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # its own edits and its products' both change the ETag
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.get(slug='widget-0').save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sellers[0].save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_validators_without_response_cache(self):
+        url = reverse('products')
+        response = self.client.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def assertModifiedSince(self, url, change):
+        last_modified = self.client.get(url)['Last-Modified']
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        # Last-Modified has whole-second resolution; the change happens later
+        later = (parse_http_date(last_modified) + 2) * 10 ** 9
+        with mock.patch('products.cache.time.time_ns', return_value=later):
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+
+    def test_last_modified_follows_changes_outside_updated_at(self):
+        seller = Seller.objects.get(products__slug='widget-1')
+
+        def rename():
+            seller.company_name += ' (renamed)'
+            seller.save()
+
+        with self.subTest('product detail, seller renamed'):
+            self.assertModifiedSince(reverse('product_detail', args=['widget-1']), rename)
+        with self.subTest('seller list, seller renamed'):
+            self.assertModifiedSince(reverse('seller-list'), rename)
+        with self.subTest('product list, product deleted'):
+            self.assertModifiedSince(reverse('products'), Product.objects.get(slug='widget-2').delete)
+
+    @override_settings(CATALOG_CACHE_TIMEOUT=60)
+    def test_product_list_not_modified(self):
+        cache.get_cache().clear()
+        url = reverse('products')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.get(slug='widget-1').save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_seller_list_stats(self):
+        # widget-1 belongs to the second seller
+        Product.objects.filter(slug='widget-1').update(price=Decimal('50.00'))
+        # COUNT + page with every seller's aggregates
+        response = self.assertQueryBudget(2, reverse('seller-list'), {'ordering': '-max_price'})
+        first = response.data['results'][0]
+        self.assertEqual(first['id'], self.sellers[1].pk)
+        self.assertEqual(first['product_count'], 15)
+        self.assertEqual((first['min_price'], first['max_price']), ('9.99', '50.00'))
+        self.assertEqual(first['total_stock'], 150)
+
+        response = self.client.get(reverse('seller-list'), {'min_price': '10', 'min_products': 1})
+        self.assertEqual(response.data['count'], 0)
+
+    def test_seller_list_ignores_bad_prices(self):
+        for value in ('abc', 'NaN', 'Infinity', '-inf'):
+            for param in ('min_price', 'max_price'):
+                with self.subTest(param=param, value=value):
+                    response = self.client.get(reverse('seller-list'), {param: value})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response.data['count'], len(self.sellers))
+
+    def test_seller_products(self):
+        url = reverse('seller-products', args=[self.sellers[0].pk])
+        # seller + page
+        response = self.assertQueryBudget(2, url)
+        self.assertEqual(len(response.data['results']), 15)
+        self.assertIsNone(response.data['next'])
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=0)
+class ProductSearchTests(CatalogFixtureMixin, QueryBudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category, cls.sellers = cls.create_catalog(0)
+
+    def create(self, name, description=''):
+        return Product.objects.create(
+            name=name, description=description, price=Decimal('1.00'), stock=1,
+            slug=name.lower().replace(' ', '-'), category=self.category, seller=self.sellers[0],
+        )
+
+    def search(self, query):
+        response = self.client.get(reverse('product-filter'), {'search': query})
+        return [row['name'] for row in response.data['results']]
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.create('Cup', 'Goes well with any teapot')
+        self.create('Teapot')
+        self.assertEqual(self.search('teapot'), ['Teapot', 'Cup'])
+
+    def test_index_follows_updates_and_deletes(self):
+        product = self.create('Kettle')
+        self.assertEqual(self.search('kettle'), ['Kettle'])
+
+        product.name, product.slug = 'Samovar', 'samovar'
+        product.save()
+        self.assertEqual(self.search('kettle'), [])
+        self.assertEqual(self.search('samovar'), ['Samovar'])
+
+        product.delete()
+        self.assertEqual(self.search('samovar'), [])
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite keeps its search index with triggers')
+    def test_missing_triggers_are_reported(self):
+        self.assertEqual(check_search_triggers(None, databases=['default']), [])
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER products_product_fts_update')
+        errors = check_search_triggers(None, databases=['default'])
+        self.assertEqual([error.id for error in errors], ['products.E001'])
+        self.assertIn('products_product_fts_update', errors[0].msg)
+
+
+class SlugAllocationTests(CatalogFixtureMixin, APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category, cls.sellers = cls.create_catalog(0)
+
+    def product(self, name, **kwargs):
+        return Product(
+            name=name, description='', price=Decimal('1.00'), stock=1,
+            category=self.category, seller=self.sellers[0], **kwargs
+        )
+
+    def test_collision_retries_with_a_suffix(self):
+        first = self.product('Tea Cup')
+        first.save()
+        second = self.product('Tea Cup')
+        with CaptureQueriesContext(connection) as queries:
+            second.save()
+        # the plain slug's insert fails, then the suffixed one goes through
+        inserts = [query['sql'] for query in queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 2)
+        self.assertEqual(first.slug, 'tea-cup')
+        self.assertRegex(second.slug, r'^tea-cup-[a-z0-9]{6}$')
+
+    def test_bulk_allocation(self):
+        self.product('Tea Cup').save()
+        batch = [self.product('Tea Cup'), self.product('Tea Cup'), self.product('Saucer'), self.product('Plate', slug='mine')]
+        allocated = slugs.allocate_slugs(Product, batch)
+        self.assertEqual(len(allocated), 3)
+        self.assertEqual(batch[2].slug, 'saucer')
+        self.assertEqual(batch[3].slug, 'mine')
+        self.assertEqual(len({product.slug for product in batch}), 4)
+        self.assertTrue(all(product.slug.startswith('tea-cup-') for product in batch[:2]))
+
+    def test_bulk_create_retries_a_lost_race(self):
+        allocate = slugs.allocate_slugs
+        calls = []
+
+        def racing_allocate(model, instances, using=None):
+            allocated = allocate(model, instances, using=using)
+            if not calls:
+                # another writer takes the slug between the check and the insert
+                self.product('Saucer', slug=instances[0].slug).save()
+            calls.append(instances[0].slug)
+            return allocated
+
+        with mock.patch.object(slugs, 'allocate_slugs', racing_allocate):
+            slugs.bulk_create_with_slugs(Product, [self.product('Saucer')])
+        self.assertEqual(calls[0], 'saucer')
+        self.assertRegex(calls[1], r'^saucer-[a-z0-9]{6}$')
+        self.assertEqual(Product.objects.filter(name='Saucer').count(), 2)
+
+    def test_bulk_create_raises_other_integrity_errors_at_once(self):
+        with mock.patch(
+            'django.db.models.QuerySet.bulk_create', side_effect=IntegrityError('FOREIGN KEY constraint failed')
+        ) as bulk_create:
+            with self.assertRaises(IntegrityError):
+                slugs.bulk_create_with_slugs(Product, [self.product('Saucer')])
+        self.assertEqual(bulk_create.call_count, 1)
+
+    def test_route_words_are_reserved(self):
+        product = self.product('Export')
+        product.save()
+        batch = [self.product('Search')]
+        slugs.allocate_slugs(Product, batch)
+        self.assertRegex(product.slug, r'^export-[a-z0-9]{6}$')
+        self.assertRegex(batch[0].slug, r'^search-[a-z0-9]{6}$')
+
+        response = self.client.get(reverse('product_detail', args=[product.slug]))
+        self.assertEqual(response.data['name'], 'Export')
+        serializer = ProductSerializer(data={
+            'name': 'Import', 'description': '', 'price': '1.00', 'stock': 1, 'slug': 'import',
+        })
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('slug', serializer.errors)
+
+
+class ProductRowSerializerTests(CatalogFixtureMixin, APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category, cls.sellers = cls.create_catalog(6)
+        Product.objects.create(
+            name='Loose', description='No category', price=Decimal('1234.5'), stock=0, seller=cls.sellers[0]
+        )
+
+    def test_renders_the_same_bytes_as_product_serializer(self):
+        products = Product.objects.order_by('id')
+        for zone in ('UTC', 'Asia/Baku'):
+            with self.subTest(zone=zone), timezone.override(zone):
+                expected = ProductSerializer(products.select_related('seller'), many=True).data
+                rows = ProductRowSerializer(ProductRowSerializer.values(products)).data
+                self.assertEqual(JSONRenderer().render(rows), JSONRenderer().render(expected))
+
+    def test_ranked_search_pages_with_a_cursor(self):
+        url = reverse('product-filter')
+        response = self.client.get(url, {'search': 'widget', 'pagination': 'cursor', 'page_size': 4})
+        self.assertEqual(len(response.data['results']), 4)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 2)
+
+
+class KeysetCursorPaginationTests(CatalogFixtureMixin, QueryBudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category, cls.sellers = cls.create_catalog(11)
+        # Every row ties on created_at, so only the id tiebreaker orders them
+        Product.objects.update(created_at=timezone.now())
+        # ...and pairs of rows tie on price
+        for product in Product.objects.all():
+            Product.objects.filter(pk=product.pk).update(price=Decimal(product.pk // 2))
+
+    def walk(self, params, link='next'):
+        response = self.client.get(reverse('products'), dict(params, pagination='cursor', page_size=3))
+        pages = [[row['id'] for row in response.data['results']]]
+        while response.data[link]:
+            response = self.client.get(response.data[link])
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.data['results']])
+        return response, pages
+
+    def test_forward_and_backward(self):
+        expected = list(Product.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        last, pages = self.walk({})
+        self.assertEqual([pk for page in pages for pk in page], expected)
+        self.assertEqual([len(page) for page in pages], [3, 3, 3, 2])
+
+        # back from the last page through the previous links
+        previous = []
+        response = last
+        while response.data['previous']:
+            response = self.client.get(response.data['previous'])
+            previous[:0] = [row['id'] for row in response.data['results']]
+        self.assertEqual(previous + pages[-1], expected)
+
+    def test_ties_on_the_ordering_field(self):
+        expected = list(Product.objects.order_by('price', 'id').values_list('id', flat=True))
+        response, pages = self.walk({'ordering': 'price'})
+        self.assertEqual([pk for page in pages for pk in page], expected)
+
+    def encode(self, payload):
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    def test_invalid_cursors(self):
+        url = reverse('products')
+        next_url = self.client.get(url, {'pagination': 'cursor', 'page_size': 3}).data['next']
+        cursor = parse_qs(urlsplit(next_url).query)['cursor'][0]
+        ordering = ['-created_at', '-id']
+        for params in (
+            {'cursor': 'not base64 json'},
+            {'cursor': self.encode({'o': ordering, 'p': ['garbage', 1], 'r': 0})},
+            {'cursor': self.encode({'o': ordering, 'p': [{'a': 1}, 1], 'r': 0})},
+            {'cursor': self.encode({'o': ordering, 'p': [None, 1], 'r': 0})},
+            {'cursor': self.encode({'o': ordering, 'p': [[1], 'x'], 'r': 0})},
+            {'cursor': self.encode({'p': ['2026-01-01T00:00:00+00:00', 1], 'r': 0})},
+            # a next link reused under another ordering
+            {'cursor': cursor, 'ordering': 'price'},
+        ):
+            with self.subTest(**params):
+                self.assertEqual(self.client.get(url, params).status_code, 404)
+
+
+class SparseFieldsetTests(CatalogFixtureMixin, QueryBudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category, cls.sellers = cls.create_catalog(20)
+
+    def get_sql(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response, ' '.join(query['sql'] for query in queries)
+
+    def test_product_lists_select_only_requested_columns(self):
+        for url, params in (
+            (reverse('products'), {}),
+            (reverse('products'), {'pagination': 'cursor', 'ordering': '-updated_at'}),
+            (reverse('product-filter'), {'search': 'widget'}),
+            (reverse('seller-products', args=[self.sellers[0].pk]), {}),
+        ):
+            with self.subTest(url=url, **params):
+                response, sql = self.get_sql(url, dict(params, fields='id,name,slug,price'))
+                self.assertEqual(list(response.data['results'][0]), ['id', 'name', 'price', 'slug'])
+                self.assertNotIn('description', sql)
+                self.assertNotIn('accounts_seller"."company_name', sql)
+
+    def test_product_exclude(self):
+        response, sql = self.get_sql(reverse('products'), {'exclude': 'description,seller'})
+        self.assertNotIn('description', response.data['results'][0])
+        self.assertIn('category', response.data['results'][0])
+        self.assertNotIn('description', sql)
+
+        response = self.client.get(reverse('product_detail', args=['widget-1']), {'fields': 'name,price'})
+        self.assertEqual(response.data, {'name': 'Widget 1', 'price': '9.99'})
+
+    def test_seller_endpoints_skip_unselected_stats(self):
+        response, sql = self.get_sql(
+            reverse('seller-list'), {'fields': 'id,product_count', 'ordering': '-max_price'}
+        )
+        self.assertEqual(list(response.data['results'][0]), ['id', 'product_count'])
+        self.assertNotIn('MIN(', sql)
+
+        # seller only; no count and no products query
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                reverse('seller-detail', args=[self.sellers[0].pk]), {'exclude': 'products,total_products'}
+            )
+        self.assertEqual(response.data['company_name'], 'Company 0')
+        self.assertNotIn('products', response.data)
+
+
+class SellerTokenAuthorizationTests(CatalogFixtureMixin, APITestCase):
+    sellers = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category, cls.sellers = cls.create_catalog(2)
+
+    def authenticate(self, seller):
+        # Token versions are normally published to the cache when a seller is saved
+        set_token_version(seller.pk, seller.token_version)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(seller.user).access_token}'
+        )
+
+    def test_write_is_authorized_from_claims(self):
+        self.authenticate(self.sellers[0])
+        # product lookup + update; no user or seller rows are loaded
+        with self.assertNumQueries(2):
+            response = self.client.put(
+                reverse('product_detail', args=['widget-0']), {'stock': 3}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_other_sellers_products_are_forbidden(self):
+        self.authenticate(self.sellers[1])
+        response = self.client.delete(reverse('product_detail', args=['widget-0']))
+        self.assertEqual(response.status_code, 403)
+
+    def test_revoking_verification_outdates_tokens(self):
+        seller = self.sellers[0]
+        self.authenticate(seller)
+        seller.is_verified = False
+        with self.captureOnCommitCallbacks(execute=True):
+            seller.save()
+        response = self.client.post(reverse('products'), {}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+
+class ProductImportTests(CatalogFixtureMixin, APITestCase):
+    sellers = 1
+    csv_header = b'name,description,price,stock,category,slug\n'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category, (cls.seller,) = cls.create_catalog(1)
+
+    def authenticate(self, seller):
+        set_token_version(seller.pk, seller.token_version)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(seller.user).access_token}'
+        )
+
+    def upload(self, content, name='products.csv'):
+        return self.client.post(
+            reverse('product-import'), {'file': SimpleUploadedFile(name, content)}, format='multipart'
+        )
+
+    def test_rows_are_validated_and_reported_by_line(self):
+        rows = list(read_rows([
+            b'{"name": "Kettle", "description": "Boils", "price": "20.00", "stock": 1}\n',
+            b'\n',
+            b'not json\n',
+            b'[1, 2]\n',
+            b'{"name": "Kettle", "description": "Boils", "price": "-1", "stock": 1}\n',
+        ], 'jsonl'))
+        self.assertEqual([line for line, data, error in rows], [1, 3, 4, 5])
+        self.assertIsNone(rows[0][2])
+        self.assertTrue(rows[1][2].startswith('Invalid JSON'))
+        self.assertEqual(rows[2][2], 'Expected a JSON object.')
+
+        report = ProductImporter(self.seller.pk).run(rows)
+        self.assertEqual((report.created, report.failed), (1, 3))
+        self.assertEqual([error['line'] for error in report.errors], [3, 4, 5])
+        self.assertIn('price', report.errors[-1]['errors'])
+
+    def test_unknown_category_or_out_of_range_stock_only_fails_its_row(self):
+        row = {'name': 'Kettle', 'description': 'Boils', 'price': '20.00', 'stock': 1}
+        rows = [
+            (1, row, None),
+            (2, dict(row, category=0), None),
+            (3, dict(row, stock=10 ** 20), None),
+            (4, dict(row, category=self.category.pk), None),
+        ]
+        report = ProductImporter(self.seller.pk).run(rows)
+        self.assertEqual((report.created, report.failed), (2, 2))
+        # field errors are reported as rows are validated, unknown categories after the lookup
+        self.assertEqual((report.errors[0]['line'], list(report.errors[0]['errors'])), (3, ['stock']))
+        self.assertEqual(report.errors[1], {'line': 2, 'errors': {'category': ['Invalid pk "0" - object does not exist.']}})
+
+    def test_database_errors_reject_only_their_batch(self):
+        row = {'name': 'Kettle', 'description': 'Boils', 'price': '20.00', 'stock': 1}
+        bulk_create = slugs.bulk_create_with_slugs
+        calls = []
+
+        def failing_once(model, instances, **kwargs):
+            calls.append(len(instances))
+            if len(calls) == 1:
+                raise DataError('value out of range')
+            return bulk_create(model, instances, **kwargs)
+
+        with mock.patch('products.importers.bulk_create_with_slugs', failing_once):
+            report = ProductImporter(self.seller.pk, batch_size=2).run([(line, row, None) for line in range(1, 5)])
+        self.assertEqual((report.created, report.failed), (2, 2))
+        self.assertEqual([error['line'] for error in report.errors], [1, 2])
+        self.assertIn('value out of range', report.errors[0]['errors'])
+
+    def test_batches_are_written_with_one_insert_each(self):
+        rows = [
+            (line, {'name': f'Kettle {line}', 'description': 'Boils', 'price': '20.00', 'stock': 1}, None)
+            for line in range(1, 6)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            report = ProductImporter(self.seller.pk, batch_size=2).run(rows)
+        self.assertEqual(report.created, 5)
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 3)
+
+    def test_upload(self):
+        self.authenticate(self.seller)
+        response = self.upload(
+            b'\xef\xbb\xbf' + self.csv_header
+            + f'Kettle,Boils,20.00,3,{self.category.pk},\n'.encode()
+            + b'"Multi\nline",Boils,20.00,3,,\n'
+            + b'Toaster,Toasts,abc,3,,\n'
+            + b'Ghost,Boo,1.00,1,999999,\n'
+            + b'Taken,Dup,1.00,1,,widget-0\n'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 3))
+        self.assertEqual([error['line'] for error in response.data['errors']], [5, 6, 7])
+        self.assertTrue(Product.objects.filter(name='Kettle', seller=self.seller, category=self.category).exists())
+
+    def test_invalid_utf8_is_a_row_error(self):
+        self.authenticate(self.seller)
+        response = self.upload(
+            self.csv_header
+            + b'Kettle,Boils,20.00,3,,\n'
+            + b'Caf\xe9,Latin-1,2.00,3,,\n'
+            + b'Toaster,Toasts,20.00,3,,\n'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['errors'], [{'line': 3, 'errors': 'Invalid UTF-8.'}])
+
+        response = self.upload(b'{"name": "Caf\xe9"}\n', name='products.jsonl')
+        self.assertEqual(response.data['errors'], [{'line': 1, 'errors': 'Invalid UTF-8.'}])
+
+    def test_upload_requires_a_verified_seller(self):
+        self.assertEqual(self.upload(self.csv_header).status_code, 401)
+        buyer = User.objects.create_user(username='buyer', password='x')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(buyer).access_token}')
+        self.assertEqual(self.upload(self.csv_header).status_code, 403)
+
+    def test_upload_rejects_missing_or_unknown_files(self):
+        self.authenticate(self.seller)
+        response = self.client.post(reverse('product-import'), {}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.upload(self.csv_header, name='products.xlsx').status_code, 400)
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile(suffix='.jsonl') as source:
+            source.write(
+                b'{"name": "Kettle", "description": "Boils", "price": "20.00", "stock": 1}\n'
+                b'{"name": "Kettle", "description": "Boils", "price": "20.00"}\n'
+            )
+            source.flush()
+            out, err = io.StringIO(), io.StringIO()
+            call_command('import_products', source.name, seller=self.seller.pk, batch_size=1, stdout=out, stderr=err)
+            with self.assertRaisesMessage(CommandError, 'Seller 0 does not exist.'):
+                call_command('import_products', source.name, seller=0)
+        self.assertIn('Created 1 products, 1 rows failed.', out.getvalue())
+        self.assertIn('line 2: {"stock"', err.getvalue())
+
+
+@override_settings(PRODUCT_EXPORT_CHUNK_SIZE=2)
+class ProductExportTests(CatalogFixtureMixin, APITestCase):
+    sellers = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category, cls.sellers = cls.create_catalog(5)
+        cls.user = User.objects.create_user(username='buyer', password='x')
+
+    def setUp(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(self.user).access_token}'
+        )
+
+    def export(self, params=None, queries=1):
+        # the rows are read while the body is streamed, with one query for the whole catalog
+        with self.assertNumQueries(queries):
+            response = self.client.get(reverse('product-export'), params)
+            chunks = list(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return response, [chunk.decode() for chunk in chunks]
+
+    def test_ndjson(self):
+        response, chunks = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="products.ndjson"')
+        # five rows in chunks of two
+        self.assertEqual(len(chunks), 3)
+        rows = [json.loads(line) for line in ''.join(chunks).splitlines()]
+        self.assertEqual([row['slug'] for row in rows], [f'widget-{i}' for i in range(5)])
+        self.assertEqual(rows[0]['price'], '9.99')
+        self.assertEqual(rows[0]['category_slug'], 'widgets')
+        self.assertEqual(rows[1]['seller_company_name'], 'Company 1')
+
+    def test_csv(self):
+        response, chunks = self.export({'format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        # the header, then five rows in chunks of two
+        self.assertEqual(len(chunks), 4)
+        rows = list(csv.reader(io.StringIO(''.join(chunks))))
+        self.assertEqual(rows[0][:3], ['id', 'name', 'slug'])
+        self.assertEqual(len(rows), 6)
+
+    def test_filters(self):
+        seller = self.sellers[0]
+        _, chunks = self.export({'seller': seller.pk, 'category': 'widgets'})
+        self.assertEqual(''.join(chunks).count('\n'), 3)
+        _, chunks = self.export({'updated_since': timezone.now().isoformat().replace('+00:00', 'Z')})
+        self.assertEqual(chunks, [])
+        for params in ({'seller': 'me'}, {'updated_since': 'yesterday'}):
+            with self.subTest(**params):
+                self.assertEqual(self.client.get(reverse('product-export'), params).status_code, 400)
+
+    def test_requires_authentication(self):
+        self.client.credentials()
+        self.assertEqual(self.client.get(reverse('product-export')).status_code, 401)
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=300, CATALOG_CACHE_ALIAS='default')
+class CatalogCacheInvalidationTests(CatalogFixtureMixin, APITestCase):
+    sellers = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category, cls.sellers = cls.create_catalog(2)
+
+    def setUp(self):
+        default_cache.clear()
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assertCached(self, *urls, hit=True):
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.get(url)['X-Cache'], 'HIT' if hit else 'MISS')
+
+    def warm(self, *urls):
+        # Detail entries aren't stored by the request that starts their versions
+        for url in urls * 2:
+            self.get(url)
+        self.assertCached(*urls)
+
+    def test_product_save_and_delete(self):
+        product = Product.objects.get(slug='widget-0')
+        lists = reverse('products'), reverse('seller-list')
+        detail, other = reverse('product_detail', args=['widget-0']), reverse('product_detail', args=['widget-1'])
+        self.warm(*lists, detail, other)
+
+        product.stock = 3
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        self.assertCached(*lists, detail, hit=False)
+        self.assertEqual(self.get(detail).data['stock'], 3)
+        # only the product's own detail entry depends on it
+        self.assertCached(other)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+        self.assertEqual(self.client.get(detail).status_code, 404)
+        self.assertEqual(self.get(lists[0]).data['count'], 1)
+
+    def test_category_save_and_delete(self):
+        categories = reverse('category-list-create')
+        detail = reverse('product_detail', args=['widget-0'])
+        self.warm(categories, reverse('products'), detail)
+
+        self.category.name = 'Gadgets'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.save()
+        self.assertCached(categories, hit=False)
+        self.assertCached(detail)
+
+        # the SET_NULL update and the delete; the category's products aren't loaded
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(2):
+            self.category.delete()
+        self.assertCached(categories, reverse('products'), detail, hit=False)
+        self.assertIsNone(self.get(detail).data['category'])
+
+    def test_seller_save(self):
+        detail = reverse('product_detail', args=['widget-0'])
+        self.warm(reverse('seller-list'), detail)
+        seller = self.sellers[0]
+        seller.company_name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            seller.save()
+        self.assertCached(reverse('seller-list'), detail, hit=False)
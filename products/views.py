@@ -1,27 +1,51 @@
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
-
-from .paginations import CustomPagination
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import Coalesce
+
+from . import cache
+from .conditional import (
+    conditional, list_validators, product_validators, seller_validators
+)
+from .exporters import ENCODERS as EXPORT_ENCODERS, CSVRenderer, NDJSONRenderer, export_queryset
+from .facets import get_facets, parse_facets
+from .fieldsets import Fieldset, sparse_response
+from .importers import FORMATS, ProductImporter, guess_format, read_rows
+from .paginations import CustomPagination, KeysetCursorPagination, get_paginator
+from .search import filter_products, get_search_backend, parse_price
+from accounts.authentication import ClaimsJWTAuthentication
 from accounts.permissions import IsSuperUserOrReadOnly, IsVerifiedSellerOrReadOnly
 from .models import Product, Category
 from accounts.models import Seller
-from .serializers import ProductSerializer, CategorySerializer, SellerSerializer, SellerDetailSerializer
+from .serializers import (
+    ProductSerializer, ProductRowSerializer, CategorySerializer, SellerDetailSerializer, SellerStatsSerializer
+)
 
 
 
 
 class ProductListCreateView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsVerifiedSellerOrReadOnly]
     pagination_class = CustomPagination
 
+    @conditional(list_validators(cache.PRODUCTS))
+    @cache.cache_response(namespaces=[cache.PRODUCTS])
     def get(self, request):
-        products = Product.objects.all()
-        paginator = CustomPagination()
+        fieldset = Fieldset.from_request(request)
+        paginator = get_paginator(request)
+        products = ProductRowSerializer.values(
+            Product.objects.all(), *paginator.get_ordering_columns(request), fieldset=fieldset
+        )
         result_page = paginator.paginate_queryset(products, request)
-        serializer = ProductSerializer(result_page, many=True, context={'request': request})
+        serializer = ProductRowSerializer(result_page, fieldset)
         return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
@@ -30,13 +54,82 @@ class ProductListCreateView(APIView):
             context={'request': request}
         )
         if serializer.is_valid():
-            serializer.save(seller=request.user.seller_profile)
+            serializer.save(seller_id=request.user.seller_id)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 
+class ProductImportView(APIView):
+    """
+    Bulk-create the seller's products from an uploaded CSV or JSON-lines file
+    (multipart field ``file``). The upload is streamed through the importer in
+    batches; invalid rows are reported without aborting the rest of the file.
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsVerifiedSellerOrReadOnly]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "A 'file' upload is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.data.get('file_format') or guess_format(upload.name)
+        if file_format not in FORMATS:
+            return Response(
+                {"error": f"Unsupported file format; use one of {', '.join(FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        importer = ProductImporter(
+            request.user.seller_id,
+            batch_size=settings.PRODUCT_IMPORT_BATCH_SIZE
+        )
+        report = importer.run(read_rows(upload, file_format))
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
+
+
+
+class ProductExportView(APIView):
+    """
+    Stream the whole catalog, or the slice selected by ``seller``, ``category``
+    and ``updated_since``, as NDJSON (default) or CSV (``?format=csv``).
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+    def get(self, request):
+        seller = request.query_params.get('seller')
+        category = request.query_params.get('category')
+        updated_since = request.query_params.get('updated_since')
+
+        if seller is not None and not seller.isdigit():
+            return Response({"error": "seller must be a seller id"}, status=status.HTTP_400_BAD_REQUEST)
+        if updated_since is not None:
+            try:
+                updated_since = parse_datetime(updated_since)
+            except ValueError:
+                updated_since = None
+            if updated_since is None:
+                return Response(
+                    {"error": "updated_since must be an ISO 8601 datetime"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        file_format = request.accepted_renderer.format
+        queryset = export_queryset(seller=seller, category=category, updated_since=updated_since)
+        response = StreamingHttpResponse(
+            EXPORT_ENCODERS[file_format](queryset, chunk_size=settings.PRODUCT_EXPORT_CHUNK_SIZE),
+            content_type=request.accepted_renderer.media_type,
+        )
+        response['Content-Disposition'] = f'attachment; filename="products.{file_format}"'
+        return response
+
+
+
 class ProductDetailView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsVerifiedSellerOrReadOnly]
 
     def get_object(self, slug):
@@ -45,6 +138,12 @@ class ProductDetailView(APIView):
             slug=slug
         )
 
+    @sparse_response
+    @conditional(product_validators)
+    @cache.cache_response(dependencies=lambda data: [
+        cache.product_key(data['id']), cache.seller_key(data['seller']['id']),
+        *([cache.category_key(data['category'])] if data['category'] else []),
+    ])
     def get(self, request, slug):
         product = self.get_object(slug)
         serializer = ProductSerializer(product, context={'request': request})
@@ -79,70 +178,43 @@ class ProductDetailView(APIView):
 
 
 class ProductSearchView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [permissions.AllowAny]
     pagination_class = CustomPagination
 
+    @conditional(list_validators(cache.PRODUCTS, cache.CATEGORIES, cache.SELLERS))
     def get(self, request):
         search_query = request.query_params.get('search', '').strip()
-        min_price = request.query_params.get('min_price')
-        max_price = request.query_params.get('max_price')
-        category = request.query_params.get('category')
-        seller = request.query_params.get('seller')
-
+        search_backend = get_search_backend()
+        products = filter_products(Product.objects.all(), request.query_params, search_backend)
 
-        filters = Q()
+        fieldset = Fieldset.from_request(request)
+        paginator = get_paginator(request, page_class=self.pagination_class)
         if search_query:
-            filters &= (
-                    Q(name__icontains=search_query) |
-                    Q(description__icontains=search_query) |
-                    Q(slug__icontains=search_query)
-            )
-
-        try:
-            if min_price:
-                filters &= Q(price__gte=float(min_price))
-            if max_price:
-                filters &= Q(price__lte=float(max_price))
-        except (ValueError, TypeError):
-            pass
-
-
-        if category:
-            filters &= (
-                    Q(category__slug__icontains=category) |
-                    Q(category__name__icontains=category)
-            )
-
-
-        if seller:
-            if seller.isdigit():
-                filters &= Q(seller__id=int(seller))
-            else:
-                filters &= (Q(seller__company_name__icontains=seller) |
-                            Q(seller__user__username__icontains=seller))
-
-
-        products = Product.objects.filter(filters).distinct()
-        print(f"Tapılan məhsul sayı: {products.count()}")
-
-
-        paginator = self.pagination_class()
+            paginator.ordering = search_backend.rank_ordering
+        products = ProductRowSerializer.values(
+            products, *paginator.get_ordering_columns(request), fieldset=fieldset
+        )
         result_page = paginator.paginate_queryset(products, request)
 
 
-        serializer = ProductSerializer(
-            result_page,
-            many=True,
-            context={'request': request}
-        )
-        return paginator.get_paginated_response(serializer.data)
+        serializer = ProductRowSerializer(result_page, fieldset)
+        response = paginator.get_paginated_response(serializer.data)
+
+        facets = parse_facets(request.query_params.get('facets'))
+        if facets:
+            response.data['facets'] = get_facets(request.query_params, facets)
+        return response
 
 
 
 class CategoryListCreateView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsSuperUserOrReadOnly]
     pagination_class = CustomPagination
 
+    @conditional(list_validators(cache.CATEGORIES))
+    @cache.cache_response(namespaces=[cache.CATEGORIES])
     def get(self, request):
         categories = Category.objects.all()
         paginator = CustomPagination()
@@ -162,11 +234,13 @@ class CategoryListCreateView(APIView):
 
 
 class CategoryDetailView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsSuperUserOrReadOnly]
 
     def get_object(self, slug):
         return get_object_or_404(Category, slug=slug)
 
+    @conditional(list_validators(cache.CATEGORIES))
     def get(self, request, slug):
         category = self.get_object(slug)
         serializer = CategorySerializer(category)
@@ -187,38 +261,138 @@ class CategoryDetailView(APIView):
 
 
 
+def parse_aware_datetime(value):
+    parsed = parse_datetime(value)
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
 class SellerListView(APIView):
+    """
+    Seller directory with catalog stats, computed for the whole page in one
+    grouped query. Accepts ``ordering`` (any stat, ``company_name`` or ``id``,
+    ``-`` for descending) and the filters in ``stat_filters``.
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [permissions.AllowAny]
 
+    ordering_fields = (
+        'id', 'company_name', 'product_count', 'min_price', 'max_price', 'total_stock', 'last_product_update',
+    )
+    # query parameter -> (lookup, parser)
+    stat_filters = {
+        'min_products': ('product_count__gte', int),
+        'max_products': ('product_count__lte', int),
+        'min_price': ('min_price__gte', parse_price),
+        'max_price': ('max_price__lte', parse_price),
+        'min_stock': ('total_stock__gte', int),
+        'updated_since': ('last_product_update__gte', parse_aware_datetime),
+    }
+
+    @conditional(list_validators(cache.SELLERS, cache.PRODUCTS))
+    @cache.cache_response(namespaces=[cache.SELLERS, cache.PRODUCTS])
     def get(self, request):
-        sellers = Seller.objects.all().order_by('id')
+        stats = {
+            'product_count': Count('products'),
+            'min_price': Min('products__price'),
+            'max_price': Max('products__price'),
+            'total_stock': Coalesce(Sum('products__stock'), 0),
+            'last_product_update': Max('products__updated_at'),
+        }
+        sellers = Seller.objects.all()
+
+        is_verified = request.query_params.get('is_verified')
+        if is_verified in ('true', 'false'):
+            sellers = sellers.filter(is_verified=is_verified == 'true')
+        ordering = request.query_params.get('ordering', 'id')
+        if ordering.lstrip('-') not in self.ordering_fields:
+            ordering = 'id'
+        used = {ordering.lstrip('-')}
+
+        filters = Q()
+        for param, (lookup, parse) in self.stat_filters.items():
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                value = parse(value)
+            except (ValueError, TypeError, ArithmeticError):
+                continue
+            if value is not None:
+                filters &= Q(**{lookup: value})
+                used.add(lookup.split('__')[0])
+
+        # Only the stats that are sent, filtered or sorted on are computed;
+        # the latter two as aliases that never reach the SELECT list
+        fieldset = Fieldset.from_request(request)
+        fields = fieldset.select(SellerStatsSerializer.Meta.fields)
+        sellers = sellers.only('id', *(name for name in fields if name not in stats)).annotate(
+            **{name: expression for name, expression in stats.items() if name in fields}
+        ).alias(
+            **{name: expression for name, expression in stats.items() if name in used and name not in fields}
+        )
+        # Filters on aggregates become HAVING clauses of the same query
+        sellers = sellers.filter(filters)
+
+        descending = ordering.startswith('-')
+        order_field = F(ordering.lstrip('-'))
+        sellers = sellers.order_by(
+            order_field.desc(nulls_last=True) if descending else order_field.asc(nulls_last=True),
+            '-id' if descending else 'id',
+        )
+
         paginator = CustomPagination()
         result_page = paginator.paginate_queryset(sellers, request)
 
-        serializer = SellerSerializer(
+        serializer = SellerStatsSerializer(
             result_page,
             many=True,
-            context={'request': request}
+            context={'request': request, 'seller_fieldset': fieldset}
         )
         return paginator.get_paginated_response(serializer.data)
 
 
 
 class SellerDetailView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [permissions.AllowAny]
 
+    @conditional(seller_validators)
     def get(self, request, pk):
-        seller = get_object_or_404(
-            Seller.objects.prefetch_related('products'),
-            pk=pk
-        )
+        fieldset = Fieldset.from_request(request)
+        fields = fieldset.select(SellerDetailSerializer.Meta.fields)
+        sellers = Seller.objects.only('id', *(name for name in fields if name not in ('total_products', 'products')))
+        if 'total_products' in fields:
+            sellers = sellers.annotate(total_products=Count('products'))
+        seller = get_object_or_404(sellers, pk=pk)
+        # Leaving out "products" also skips the query for them
         serializer = SellerDetailSerializer(
             seller,
-            context={'request': request}
+            context={'request': request, 'seller_fieldset': fieldset}
         )
         return Response(serializer.data)
 
 
+class SellerProductListView(APIView):
+    """A seller's products, newest first, with keyset cursor pagination."""
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [permissions.AllowAny]
+
+    @conditional(list_validators(cache.PRODUCTS))
+    @cache.cache_response(namespaces=[cache.PRODUCTS])
+    def get(self, request, pk):
+        seller = get_object_or_404(Seller.objects.only('id'), pk=pk)
+        fieldset = Fieldset.from_request(request)
+        paginator = KeysetCursorPagination()
+        products = ProductRowSerializer.values(
+            seller.products.all(), *paginator.get_ordering_columns(request), fieldset=fieldset
+        )
+        result_page = paginator.paginate_queryset(products, request)
+        serializer = ProductRowSerializer(result_page, fieldset)
+        return paginator.get_paginated_response(serializer.data)
+
+
 
 
 